@@ -0,0 +1,110 @@
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:  # Optional: without NumPy the engine scores positions with the incremental evaluator
+    np = None
+
+from evaluator import (CENTER_BONUS, CENTER_REACH, DIRECTIONS, WALL, WIN_LENGTH, PatternEvaluator, pattern_table,
+                       reference_evaluate, window_size)
+
+_table_arrays = {}
+
+
+def available():
+    """True if NumPy is installed and the batch functions can be used."""
+    return np is not None
+
+
+def _table(win_length):
+    """The evaluator's pattern table as a NumPy array, built once per process and win length."""
+    if win_length not in _table_arrays:
+        _table_arrays[win_length] = np.array(pattern_table(win_length), dtype=np.int64)
+    return _table_arrays[win_length]
+
+
+def stack_boards(boards):
+    """Stack the grids of boards of one size into a (N, size, size) uint8 array."""
+    size = boards[0].size
+    cells = b"".join(board.snapshot()[1] for board in boards)
+    return np.frombuffer(cells, dtype=np.uint8).reshape(len(boards), size, size)
+
+
+def evaluate_batch(grids, win_length=WIN_LENGTH):
+    """Score a stack of positions shaped (N, size, size) (0 empty, 1 and 2 stones) at once.
+
+    Returns an int64 array of the scores reference_evaluate gives each position. The stack is padded
+    with WALL cells, and for each direction the window centered on every cell (9 cells for five in a
+    row) is encoded from one shifted view of the padded stack per window cell, the same two bits per
+    cell as PatternEvaluator's line codes; one lookup in the pattern table then scores every window
+    of every position.
+    """
+    grids = np.asarray(grids, dtype=np.uint8)
+    count, size, _ = grids.shape
+    window = window_size(win_length)
+    reach = window // 2
+    padded = np.full((count, size + 2 * reach, size + 2 * reach), WALL, dtype=np.uint32)
+    padded[:, reach:reach + size, reach:reach + size] = grids
+    table = _table(win_length)
+    scores = np.zeros(count, dtype=np.int64)
+    codes = np.empty((count, size, size), dtype=np.uint32)
+    for dx, dy in DIRECTIONS:
+        codes[:] = 0
+        for i in range(window):  # Cell i of a window lies i - reach steps along the direction
+            top = reach + (i - reach) * dy
+            left = reach + (i - reach) * dx
+            codes |= padded[:, top:top + size, left:left + size] << np.uint32(2 * i)
+        scores += table[codes].sum(axis=(1, 2))
+    middle = size // 2
+    center = grids[:, middle - CENTER_REACH:middle + CENTER_REACH + 1, middle - CENTER_REACH:middle + CENTER_REACH + 1]
+    scores += len(DIRECTIONS) * CENTER_BONUS * ((center == 2).sum(axis=(1, 2)) - (center == 1).sum(axis=(1, 2)))
+    return scores
+
+
+def child_scores(board, moves, player):
+    """Scores (as evaluate_batch) of the positions after player plays each of moves on board."""
+    base = np.frombuffer(board.snapshot()[1], dtype=np.uint8).reshape(board.size, board.size)
+    grids = np.repeat(base[np.newaxis], len(moves), axis=0)
+    xs, ys = np.array(moves, dtype=np.intp).reshape(-1, 2).T
+    grids[np.arange(len(moves)), ys, xs] = player
+    return evaluate_batch(grids, board.win_length)
+
+
+def replay_grids(moves, size, plies=None):
+    """The positions after each of the first plies moves of a game, as a (plies, size, size) stack.
+
+    moves are cells (y * size + x) alternating from player 1, as in a game record.
+    """
+    cells = np.frombuffer(bytes(moves[:plies]), dtype=np.uint8).astype(np.intp)
+    count = len(cells)
+    colors = np.where(np.arange(count) % 2 == 0, 1, 2).astype(np.uint8)
+    grids = np.zeros((count, size * size), dtype=np.uint8)
+    grids[:, cells] = np.tri(count, dtype=np.uint8) * colors  # Stone j is on the board from ply j on
+    return grids.reshape(count, size, size)
+
+
+if __name__ == "__main__":
+    # Check evaluate_batch against reference_evaluate and compare its cost per position:
+    # python batch_evaluator.py [positions] [board size] [win length]
+    from evaluator import _random_corpus
+    if not available():
+        sys.exit("NumPy is not installed")
+    count, size, win_length = [int(arg) for arg in sys.argv[1:4]] + [2000, 15, WIN_LENGTH][len(sys.argv[1:4]):]
+    corpus = _random_corpus(count, size, win_length=win_length)
+    grids = stack_boards(corpus)
+    evaluate_batch(grids[:1], win_length)  # Build the table outside the timing
+
+    start = time.perf_counter()
+    scores = evaluate_batch(grids, win_length)
+    batch_time = (time.perf_counter() - start) / len(corpus)
+    assert [int(score) for score in scores] == [reference_evaluate(board) for board in corpus], "score mismatch"
+
+    evaluator = PatternEvaluator(size, win_length)
+    start = time.perf_counter()
+    for board in corpus:
+        evaluator.load(board)
+    load_time = (time.perf_counter() - start) / len(corpus)
+    print(f"{len(corpus)} positions match the reference evaluator")
+    print(f"batch: {batch_time * 1e6:.1f} us/position, incremental load: {load_time * 1e6:.1f} us/position "
+          f"({load_time / batch_time:.1f}x)")
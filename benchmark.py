@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from gomoku_board import AIPlayer, ALGORITHMS, GRID_SIZE, board_class
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+POSITIONS_FILE = os.path.join(BENCHMARK_DIR, "positions.json")
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_DEPTHS = [2, 3]
+DEFAULT_THRESHOLD = 0.10  # Relative increase in time or nodes reported as a regression
+
+
+def load_positions(path=POSITIONS_FILE):
+    """Load the benchmark corpus: a list of {"name", "moves"} with moves alternating from player 1."""
+    with open(path) as f:
+        return json.load(f)["positions"]
+
+
+def setup_board(moves, backend="list"):
+    """Replay a move list and return (board, side to move)."""
+    board = board_class(backend)(GRID_SIZE)
+    for i, (x, y) in enumerate(moves):
+        board.make_move(x, y, 1 if i % 2 == 0 else 2)
+    return board, 1 if len(moves) % 2 == 0 else 2
+
+
+def run_position(position, depth, backend="list", **ai_options):
+    """Search one position at a fixed depth with a fresh engine and return its measurements.
+
+    Threat search is off so the numbers describe minimax, evaluation and move ordering alone.
+    """
+    board, player = setup_board(position["moves"], backend)
+    ai = AIPlayer(board, depth=depth, player=player, threat_search=False, **ai_options)
+    start = time.perf_counter()
+    move = ai.get_best_move()
+    elapsed = time.perf_counter() - start
+    return {
+        "position": position["name"],
+        "depth": depth,
+        "move": list(move) if move else None,
+        "nodes": ai.nodes,
+        "leaves": ai.leaves,
+        "cutoffs": ai.cutoffs,
+        "time": round(elapsed, 4),
+        "nps": round(ai.nodes / elapsed) if elapsed > 0 else 0,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return (regressions, changes) of results against a baseline with the same positions and depths.
+
+    The baseline must have been recorded with the same search options; main() checks that.
+
+    Node counts are deterministic, so they are compared per search; wall time is noisy, so only the
+    total over the searches present in both runs is compared.
+    """
+    previous = {(entry["position"], entry["depth"]): entry for entry in baseline["results"]}
+    regressions, changes = [], []
+    old_time = new_time = 0.0
+    for result in results:
+        old = previous.get((result["position"], result["depth"]))
+        if old is None:
+            continue
+        label = f"{result['position']} depth {result['depth']}"
+        old_time += old["time"]
+        new_time += result["time"]
+        if old["nodes"] and (result["nodes"] - old["nodes"]) / old["nodes"] > threshold:
+            regressions.append(f"{label}: nodes {old['nodes']} -> {result['nodes']} "
+                               f"(+{(result['nodes'] - old['nodes']) / old['nodes']:.0%})")
+        if result["move"] != old["move"]:
+            changes.append(f"{label}: move {old['move']} -> {result['move']}")
+    if old_time and (new_time - old_time) / old_time > threshold:
+        regressions.append(f"total time {old_time:.2f}s -> {new_time:.2f}s (+{(new_time - old_time) / old_time:.0%})")
+    return regressions, changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the search on a fixed position corpus.")
+    parser.add_argument("--depths", type=int, nargs="+", default=DEFAULT_DEPTHS, help="search depths to run")
+    parser.add_argument("--positions", default=POSITIONS_FILE, help="position corpus (JSON)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline results to compare against (JSON)")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown or node increase flagged as a regression")
+    parser.add_argument("--backend", default="list", help="board backend: list or bitboard")
+    parser.add_argument("--algorithm", default="minimax", choices=ALGORITHMS, help="search algorithm to benchmark")
+    parser.add_argument("--root-eval", action="store_true",
+                        help="order root moves by static evaluation (batched with NumPy when installed)")
+    args = parser.parse_args()
+    # Node counts and times depend on these, so a baseline only holds for the options it was recorded with
+    options = {"algorithm": args.algorithm, "backend": args.backend, "root_eval": args.root_eval}
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        recorded = baseline.get("options")
+        if recorded != options:
+            recorded = f"with options {recorded}" if recorded is not None else "without its search options"
+            parser.error(f"{args.baseline} was recorded {recorded}, not {options}; rerun with its options "
+                         "or save a baseline for these to another file (--baseline FILE --save-baseline)")
+
+    results = []
+    print(f"{'position':<10} {'depth':>5} {'move':>8} {'nodes':>8} {'leaves':>8} {'cutoffs':>8} {'time':>8} {'nps':>8}")
+    for position in load_positions(args.positions):
+        for depth in args.depths:
+            result = run_position(position, depth, args.backend, algorithm=args.algorithm,
+                                  root_eval=args.root_eval)
+            results.append(result)
+            print(f"{result['position']:<10} {depth:>5} {str(tuple(result['move'])):>8} {result['nodes']:>8} "
+                  f"{result['leaves']:>8} {result['cutoffs']:>8} {result['time']:>8.3f} {result['nps']:>8}")
+    total_nodes = sum(result["nodes"] for result in results)
+    total_time = sum(result["time"] for result in results)
+    print(f"total: {total_nodes} nodes in {total_time:.2f}s = {total_nodes / total_time:,.0f} nodes/s")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"depths": args.depths, "options": options, "results": results}, f, indent=1)
+        print(f"baseline written to {args.baseline}")
+        return
+    if baseline is not None:
+        regressions, changes = compare(results, baseline, args.threshold)
+        for change in changes:
+            print("CHANGED", change)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if regressions:
+            sys.exit(1)  # Lets CI fail the build
+
+
+if __name__ == "__main__":
+    main()
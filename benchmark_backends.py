@@ -0,0 +1,59 @@
+import sys
+import time
+
+from gomoku_board import AIPlayer, GRID_SIZE, board_class
+
+# Move sequences (x, y), alternating from player 1, that set up the benchmark positions
+POSITIONS = [
+    [(7, 7), (7, 6), (8, 8), (6, 6), (8, 6), (9, 5), (6, 8)],
+    [(7, 7), (7, 6), (8, 8), (6, 6), (8, 6), (9, 5), (6, 8), (5, 9), (5, 8)],
+    [(7, 7), (8, 7), (7, 8), (7, 6), (6, 9), (8, 9), (6, 7), (5, 6), (8, 6), (9, 5), (6, 6), (6, 8)],
+]
+BACKENDS = ["list", "bitboard"]
+
+
+def setup(backend, moves):
+    """Build a board of the given backend from a move sequence."""
+    board = board_class(backend)(GRID_SIZE)
+    for i, (x, y) in enumerate(moves):
+        board.make_move(x, y, 1 if i % 2 == 0 else 2)
+    return board
+
+
+def search_throughput(backend, depth):
+    """Run a fixed-depth search on every position; return (moves, nodes, seconds)."""
+    moves, nodes, elapsed = [], 0, 0.0
+    for position in POSITIONS:
+        ai = AIPlayer(setup(backend, position), depth=depth, threat_search=False)
+        start = time.perf_counter()
+        moves.append(ai.get_best_move())
+        elapsed += time.perf_counter() - start
+        nodes += ai.nodes
+    return moves, nodes, elapsed
+
+
+def board_ops_throughput(backend, rounds=200):
+    """Time the board operations the search repeats per node: candidates, then place/undo each."""
+    boards = [setup(backend, position) for position in POSITIONS]
+    operations = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for board in boards:
+            for x, y in board.get_nearby_cells():
+                board.place(x, y, 2)
+                board.undo(x, y)
+                operations += 1
+    return operations, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    results = {}
+    for backend in BACKENDS:
+        moves, nodes, elapsed = search_throughput(backend, depth)
+        operations, ops_elapsed = board_ops_throughput(backend)
+        results[backend] = moves
+        print(f"{backend:>9}: depth {depth}: {nodes} nodes in {elapsed:.2f}s = {nodes / elapsed:,.0f} nodes/s; "
+              f"place+undo: {operations / ops_elapsed:,.0f} ops/s")
+    if any(moves != results[BACKENDS[0]] for moves in results.values()):
+        print("WARNING: backends chose different moves:", results)
@@ -0,0 +1,64 @@
+import argparse
+import time
+
+from benchmark import POSITIONS_FILE, load_positions, setup_board
+from gomoku_board import AIPlayer, ALGORITHMS
+from parallel_search import ParallelSearch
+
+
+def sequential(positions, depth, algorithm):
+    """Search every position with a single AIPlayer; return (moves, nodes, seconds)."""
+    moves, nodes, elapsed = [], 0, 0.0
+    for position in positions:
+        board, player = setup_board(position["moves"])
+        ai = AIPlayer(board, depth=depth, player=player, threat_search=False, algorithm=algorithm)
+        start = time.perf_counter()
+        moves.append(ai.get_best_move())
+        elapsed += time.perf_counter() - start
+        nodes += ai.nodes
+    return moves, nodes, elapsed
+
+
+def parallel(positions, depth, algorithm, workers):
+    """Search every position with a ParallelSearch of the given size; return (moves, nodes, seconds).
+
+    The pool is started and warmed up before timing, so process start-up is not counted.
+    """
+    search = ParallelSearch(workers=workers)
+    try:
+        warmup, player = setup_board(positions[0]["moves"])
+        search.search(warmup, player, depth=1, algorithm=algorithm, threat_search=False)
+        moves, nodes, elapsed = [], 0, 0.0
+        for position in positions:
+            board, player = setup_board(position["moves"])
+            start = time.perf_counter()
+            moves.append(search.search(board, player, depth=depth, algorithm=algorithm, threat_search=False))
+            elapsed += time.perf_counter() - start
+            nodes += search.nodes
+        return moves, nodes, elapsed
+    finally:
+        search.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the speedup of the parallel root search.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="worker counts to measure")
+    parser.add_argument("--depth", type=int, default=3, help="fixed search depth")
+    parser.add_argument("--algorithm", default="minimax", choices=ALGORITHMS, help="search algorithm")
+    parser.add_argument("--positions", default=POSITIONS_FILE, help="position corpus (JSON)")
+    args = parser.parse_args()
+
+    positions = load_positions(args.positions)
+    base_moves, base_nodes, base_time = sequential(positions, args.depth, args.algorithm)
+    print(f"{'workers':>10} {'nodes':>8} {'time':>8} {'nps':>8} {'speedup':>8} {'moves':>6}")
+    print(f"{'sequential':>10} {base_nodes:>8} {base_time:>8.2f} {base_nodes / base_time:>8.0f} {1.0:>8.2f} "
+          f"{len(positions):>3}/{len(positions)}")
+    for workers in args.workers:
+        moves, nodes, elapsed = parallel(positions, args.depth, args.algorithm, workers)
+        same = sum(move == base for move, base in zip(moves, base_moves))
+        print(f"{workers:>10} {nodes:>8} {elapsed:>8.2f} {nodes / elapsed:>8.0f} {base_time / elapsed:>8.2f} "
+              f"{same:>3}/{len(positions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+from gomoku_board import WIN_LENGTH, zobrist_keys, neighborhoods
+
+_geometry_cache = {}
+
+
+def _geometry(size, win_length):
+    """Masks shared by every bitboard of a size and win length: (board mask, per-cell segments).
+
+    A cell's segment in a direction is the 2 * win_length - 1 cells centered on it, the only cells a
+    winning line through it can use. Each comes with the shifts check_win() applies along it: ones
+    that double the run length up to the largest power of two within win_length, then one that
+    overlaps two such runs (1, 2 and 1 cells for five).
+    """
+    if (size, win_length) not in _geometry_cache:
+        stride = size + 1
+        lengths = []  # Cells moved by each shift-and-mask step
+        length = 1
+        while 2 * length <= win_length:
+            lengths.append(length)
+            length *= 2
+        if length < win_length:
+            lengths.append(win_length - length)
+        board_mask = 0
+        for y in range(size):
+            for x in range(size):
+                board_mask |= 1 << (y * stride + x)
+        segments = [None] * (size * stride)
+        for y in range(size):
+            for x in range(size):
+                masks = []
+                for dx, dy in [(1, 0), (0, 1), (1, 1), (-1, 1)]:
+                    mask = 0
+                    for i in range(1 - win_length, win_length):
+                        nx, ny = x + i * dx, y + i * dy
+                        if 0 <= nx < size and 0 <= ny < size:
+                            mask |= 1 << (ny * stride + nx)
+                    masks.append(mask)
+                segments[y * stride + x] = tuple((mask, tuple(step * length for length in lengths))
+                                                 for step, mask in zip((1, stride, stride + 1, stride - 1), masks))
+        _geometry_cache[(size, win_length)] = (board_mask, segments)
+    return _geometry_cache[(size, win_length)]
+
+
+class BitboardBoard:
+    __slots__ = ("size", "win_length", "stride", "board_mask", "segments", "stones", "last_move", "zobrist", "hash",
+                 "winner", "winning_move", "neighborhoods", "near_counts", "near", "move_history")
+
+    def __init__(self, size, win_length=WIN_LENGTH):
+        """Gomoku board storing each player's stones as one Python int bitboard.
+
+        Cell (x, y) is bit y * (size + 1) + x. The extra guard column at the end of every row is
+        always empty, so the horizontal and both diagonal directions are plain shifts (1, stride + 1
+        and stride - 1, vertical is stride) and runs can never wrap from one row into the next; no
+        rotated copies of the boards are needed. Exposes the same interface as GomokuBoard.
+        """
+        self.size = size
+        self.win_length = win_length
+        self.stride = size + 1  # One guard column per row
+        self.board_mask, self.segments = _geometry(size, win_length)  # segments[bit] = ((segment mask, shifts), ...)
+        self.stones = [0, 0, 0]  # Bitboards indexed by player (index 0 unused)
+        self.last_move = None
+        self.zobrist = zobrist_keys(size)
+        self.hash = 0
+        self.winner = 0
+        self.winning_move = None
+        self.neighborhoods = neighborhoods(size)
+        self.near_counts = [0] * (size * size)  # Stones within CANDIDATE_RADIUS of each cell (itself included)
+        self.near = 0  # Bitboard of the cells with a nonzero near count
+        self.move_history = []  # Moves made with make_move(), in order; undo_move() takes back the last
+
+    def reset(self):
+        """Reset the board to its initial state."""
+        self.stones = [0, 0, 0]
+        self.last_move = None
+        self.move_history = []
+        self.hash = 0
+        self.winner = 0
+        self.winning_move = None
+        self.near_counts = [0] * (self.size * self.size)
+        self.near = 0
+
+    @property
+    def grid(self):
+        """Row-major grid[y][x] view of the board, built on each access (read-only)."""
+        grid = [[0] * self.size for _ in range(self.size)]
+        for player in (1, 2):
+            for x, y in self._cells(self.stones[player]):
+                grid[y][x] = player
+        return grid
+
+    def snapshot(self):
+        """Pack the board into a compact, picklable snapshot (size, one byte per cell, last move, win length)."""
+        return (self.size, bytes(cell for row in self.grid for cell in row), self.last_move, self.win_length)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Rebuild a board from a snapshot produced by snapshot()."""
+        size, cells, last_move, win_length = snapshot
+        board = cls(size, win_length)
+        for index, cell in enumerate(cells):
+            if cell:
+                board.place(index % size, index // size, cell)
+        board.last_move = last_move
+        return board
+
+    def _cells(self, bits):
+        """Yield the (x, y) coordinates of the set bits of a bitboard."""
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            yield index % self.stride, index // self.stride
+            bits ^= low
+
+    def is_valid_move(self, x, y):
+        """Check if a move is valid by ensuring the coordinates are within bounds and the cell is empty."""
+        if not (0 <= x < self.size and 0 <= y < self.size):
+            return False
+        return not ((self.stones[1] | self.stones[2]) >> (y * self.stride + x)) & 1
+
+    def make_move(self, x, y, player):
+        """Make a move for a player (1 or 2) on the board at the specified coordinates."""
+        if self.is_valid_move(x, y):
+            self.place(x, y, player)
+            self.last_move = (x, y)
+            self.move_history.append(self.last_move)
+            return True
+        return False
+
+    def undo_move(self):
+        """Take back the last move made with make_move() and return it, or None if there is none."""
+        if not self.move_history:
+            return None
+        x, y = self.move_history.pop()
+        self.undo(x, y)
+        self.last_move = self.move_history[-1] if self.move_history else None
+        return x, y
+
+    def place(self, x, y, player):
+        """Put a stone on an empty cell without validation; used by the search for trial moves."""
+        self.stones[player] |= 1 << (y * self.stride + x)
+        self.hash ^= self.zobrist[player][y * self.size + x]
+        near_counts = self.near_counts
+        for near, (nx, ny) in self.neighborhoods[y * self.size + x]:
+            near_counts[near] += 1
+            if near_counts[near] == 1:
+                self.near |= 1 << (ny * self.stride + nx)
+        if not self.winner and self.check_win(x, y, player):
+            self.winner = player
+            self.winning_move = (x, y)
+
+    def undo(self, x, y):
+        """Remove the stone placed by place()."""
+        bit = 1 << (y * self.stride + x)
+        player = 1 if self.stones[1] & bit else 2
+        self.stones[player] &= ~bit
+        self.hash ^= self.zobrist[player][y * self.size + x]
+        near_counts = self.near_counts
+        for near, (nx, ny) in self.neighborhoods[y * self.size + x]:
+            near_counts[near] -= 1
+            if near_counts[near] == 0:
+                self.near &= ~(1 << (ny * self.stride + nx))
+        if self.winning_move == (x, y):
+            self.winner = 0
+            self.winning_move = None
+
+    def check_win(self, x, y, player):
+        """Check if the specified player has win_length stones in a row through (x, y).
+
+        Any winning line inside the segment centered on (x, y) must contain it, so each direction is
+        the segment mask followed by the segment's shift-and-mask steps (three for five in a row).
+        """
+        stones = self.stones[player]
+        for segment, shifts in self.segments[y * self.stride + x]:
+            runs = stones & segment
+            for shift in shifts:
+                runs &= runs >> shift  # Starts of runs as long as the cells shifted so far, plus one
+            if runs:
+                return True
+        return False
+
+    def get_nearby_cells(self, out=None):
+        """Get the empty cells within CANDIDATE_RADIUS of any stone, or the center on an empty board.
+
+        Like GomokuBoard.get_nearby_cells, out is an optional list to refill.
+        """
+        if out is None:
+            out = []
+        out[:] = self._cells(self.near & ~(self.stones[1] | self.stones[2]))
+        if not out:
+            out.append((self.size // 2, self.size // 2))
+        return out
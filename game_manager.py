@@ -1,22 +1,31 @@
 import pygame
 import asyncio
+import platform
 import sys
+from concurrent.futures import BrokenExecutor
 from gomoku_board import GomokuBoard
 from game_ui import GameUI
 from gomoku_board import WINDOW_WIDTH, WINDOW_HEIGHT, OFFSET_X, OFFSET_Y, CELL_SIZE, FPS, BLUE, RED, YELLOW
 from gomoku_board import WHITE, BLACK, GRAY, LIGHT_GRAY
-from gomoku_board import GomokuBoard, GRID_SIZE, AIPlayer
+from gomoku_board import GomokuBoard, GRID_SIZE, AIPlayer, AI_TIME_LIMIT, AI_TIME_GRACE, AI_ALGORITHM, board_class
+from search_executor import SearchExecutor
+from search_stats import format_stats, log_line
+from opening_book import DEFAULT_BOOK_FILE
+
+# The browser build (pygbag) has neither worker processes nor threads: the AI searches on the event loop there
+WORKERS_AVAILABLE = platform.system() != "Emscripten"
 
 class GameManager:
-    def __init__(self):
-        # Initialize pygame and set up the game window
+    def __init__(self, backend="list"):
+        # Initialize pygame and set up the game window; backend picks the board representation ("list" or "bitboard")
         pygame.init()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("Gomoku 15x15")
         self.clock = pygame.time.Clock()
         
         # Initialize the game board and UI
-        self.board = GomokuBoard(GRID_SIZE)
+        self.backend = backend
+        self.board = board_class(backend)(GRID_SIZE)
         self.ui = GameUI(self.screen, self.board)
         
         # Set up the initial game state
@@ -25,21 +34,12 @@ class GameManager:
         self.winner = None
         self.ai_thinking = False
         self.game_mode = None  # None: selection screen, "ai": vs AI, "human": vs human
-        self.ai = None  # Will be initialized when AI mode is selected
+        self.search_executor = None  # Will be initialized when AI mode is selected
+        self.ai_task = None  # Background task running the current AI search
+        self.show_stats = False  # F3 toggles search profiling: an overlay plus one JSON log line per AI move
+        self.last_stats = None  # Profile of the last AI search, shown by the overlay
         self.setup_buttons()
 
-    def get_dynamic_depth(self):
-        # Calculate AI search depth based on the number of moves made so far
-        total_moves = sum(cell != 0 for row in self.board.grid for cell in row)
-        if total_moves < 10:
-            return 2
-        elif total_moves < 20:
-            return 3
-        elif total_moves < 30:
-            return 4
-        else:
-            return 3  # Reduce depth in later stages to avoid slowness
-
     def setup_buttons(self):
         # Define button dimensions and position for mode selection and game controls
         button_width = 200
@@ -54,28 +54,51 @@ class GameManager:
         self.play_again_button = pygame.Rect(center_x - button_width - 20, WINDOW_HEIGHT - 80, button_width, button_height)
         self.close_button = pygame.Rect(center_x + 20, WINDOW_HEIGHT - 80, button_width, button_height)
 
+    def start_executor(self):
+        # Start the AI's worker pool unless there is one already or the platform cannot run one
+        if self.search_executor is None and WORKERS_AVAILABLE:
+            try:
+                self.search_executor = SearchExecutor(backend=self.backend)
+            except (OSError, NotImplementedError):
+                pass  # No shared memory for the workers here; this move is searched locally
+
+    async def local_move(self):
+        # Quick depth-1 search used when no worker answers; it searches a copy because the search places
+        # stones on its board, in a thread so the window keeps redrawing where threads exist
+        board = board_class(self.backend).from_snapshot(self.board.snapshot())
+        ai = AIPlayer(board, depth=1, threat_search=False)
+        if not WORKERS_AVAILABLE:
+            return ai.get_best_move()
+        return await asyncio.to_thread(ai.get_best_move)
+
     async def ai_turn(self):
-        # Handle the AI's turn, including thinking animation and move calculation
-        self.ai_thinking = True
-        self.ui.draw_text("AI Thinking...", (WINDOW_WIDTH // 2 - 100, 20), RED, small=True)
-        self.ui.update_display()
-        
-        # Initialize AI if not already done
-        if self.ai is None:
-            self.ai = AIPlayer(self.board)
-        
-        # Set AI's search depth based on game progress
-        self.ai.depth = self.get_dynamic_depth()
-        
+        # Handle the AI's turn; runs as a background task while the main loop keeps rendering
+        self.start_executor()
         try:
-            # Wait for AI to decide on a move with a 2-second timeout
-            move = await asyncio.wait_for(self.ai.get_best_move(), timeout=2.0)
-        except asyncio.TimeoutError:
-            # If AI doesn't decide in time, pick an empty nearby cell
-            empty_cells = self.board.get_nearby_cells()
-            move = empty_cells[0] if empty_cells else None
-        
-        self.ai_thinking = False
+            move = None
+            searched = False
+            if self.search_executor is not None:
+                try:
+                    # Iterative deepening in a worker process: the deepest search that fits in the time budget
+                    move = await self.search_executor.search(self.board, AI_TIME_LIMIT + AI_TIME_GRACE,
+                                                             time_limit=AI_TIME_LIMIT, algorithm=AI_ALGORITHM,
+                                                             book=DEFAULT_BOOK_FILE, stats=self.show_stats)
+                    searched = True
+                    self.last_stats = self.search_executor.last_info["stats"]
+                    if self.last_stats is not None:
+                        print(log_line(self.last_stats, move), flush=True)
+                except asyncio.TimeoutError:
+                    pass  # The worker didn't answer in time
+                except (BrokenExecutor, OSError, NotImplementedError):
+                    # The pool is broken (a worker died) or cannot start: drop it; the next move starts a new one
+                    self.search_executor.shutdown()
+                    self.search_executor = None
+            if not searched:
+                move = await self.local_move()
+        finally:
+            self.ai_thinking = False
+            if self.ai_task is asyncio.current_task():
+                self.ai_task = None
         
         # If a valid move is found, apply it and check for a win
         if move:
@@ -84,6 +107,22 @@ class GameManager:
             if self.board.check_win(x, y, 2):
                 self.winner = 2
                 self.game_over = True
+        self.current_player = 1
+
+    def cancel_ai_turn(self):
+        # Stop waiting for the AI and tell the worker to abandon its search
+        if self.ai_task is not None:
+            self.ai_task.cancel()
+            self.ai_task = None
+        self.ai_thinking = False
+
+    def quit_game(self):
+        # Shut down the AI workers and close the window
+        self.cancel_ai_turn()
+        if self.search_executor is not None:
+            self.search_executor.shutdown()
+        pygame.quit()
+        sys.exit()
 
     def handle_click(self, pos):
         # Handle click events for mode selection and game actions
@@ -91,7 +130,7 @@ class GameManager:
             # Mode selection screen
             if self.ai_button.collidepoint(pos):
                 self.game_mode = "ai"
-                self.ai = AIPlayer(self.board)  # Initialize AI for AI mode
+                self.start_executor()  # Initialize AI for AI mode
                 return
             elif self.human_button.collidepoint(pos):
                 self.game_mode = "human"
@@ -104,8 +143,7 @@ class GameManager:
                 self.reset_game()
                 return
             elif self.close_button.collidepoint(pos):
-                pygame.quit()
-                sys.exit()
+                self.quit_game()
                 return
         
         # Regular game play
@@ -128,12 +166,16 @@ class GameManager:
                 self.current_player = 2 if self.current_player == 1 else 1
 
     def reset_game(self):
-        # Reset the game state for a new game
+        # Reset the game state for a new game, dropping any search still in flight
+        self.cancel_ai_turn()
+        if self.search_executor is not None:
+            self.search_executor.new_game()
         self.board.reset()
         self.current_player = 1
         self.game_over = False
         self.winner = None
         self.ai_thinking = False
+        self.last_stats = None
 
     def draw_mode_selection(self):
         # Draw the mode selection screen with buttons for "Play vs AI" and "Play vs Human"
@@ -156,41 +198,73 @@ class GameManager:
         pygame.draw.rect(self.screen, GRAY, self.close_button)
         self.ui.draw_text("Close Game", (self.close_button.x + 30, self.close_button.y + 10), BLACK, small=True)
 
+    def scene(self):
+        # Everything shown besides the stones; the UI redraws the whole frame when this changes.
+        # While something covers the board (the stats overlay or the game over buttons), a stone
+        # change also redraws the frame, since redrawing just its cell would paint over the overlay
+        stats = self.last_stats if self.show_stats else None
+        covered = stats is not None or self.game_over
+        return (self.game_mode, self.current_player, self.ai_thinking, self.game_over, self.winner,
+                stats, self.board.hash if covered else None)
+
     async def run(self):
         # Main game loop
+        loop = asyncio.get_running_loop()
         running = True
+        caption_time = 0.0  # When the frame time in the window title was last refreshed
         while running:
+            frame_start = loop.time()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
-                    pygame.quit()
-                    sys.exit()
+                    self.quit_game()
+                elif event.type == pygame.VIDEOEXPOSE:
+                    self.ui.invalidate()
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     self.handle_click(pygame.mouse.get_pos())
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    # Profiling only costs time while it is on; it applies from the next AI move
+                    self.show_stats = not self.show_stats
+                    if not self.show_stats:
+                        pygame.display.set_caption("Gomoku 15x15")
 
-            if self.game_mode is None:
-                self.draw_mode_selection()
-            else:
-                # Draw the board and handle game-over or AI thinking states
-                self.ui.draw_board()
-                
-                if self.ai_thinking:
-                    self.ui.draw_text("AI Thinking...", (WINDOW_WIDTH // 2 - 100, 20), RED, small=True)
-                elif self.game_over:
-                    if self.winner:
-                        self.ui.draw_text(f"Player {self.winner} Wins!", (WINDOW_WIDTH // 2 - 120, 20), RED)
-                    else:
-                        self.ui.draw_text("Draw!", (WINDOW_WIDTH // 2 - 60, 20), RED)
-                    # Draw the game over buttons
-                    self.draw_game_over_buttons()
+            # Redraw only what changed: the whole frame when the scene (mode, status, overlays) changes,
+            # otherwise just the cells whose stones changed, and nothing at all while the game is idle
+            if self.ui.begin_frame(self.scene()):
+                if self.game_mode is None:
+                    self.draw_mode_selection()
                 else:
-                    self.ui.draw_text(f"Player {self.current_player}'s Turn", (WINDOW_WIDTH - 250, 20), BLUE, small=True)
+                    # Draw the board and handle game-over or AI thinking states
+                    self.ui.draw_board(full=True)
+
+                    if self.ai_thinking:
+                        self.ui.draw_text("AI Thinking...", (WINDOW_WIDTH // 2 - 100, 20), RED, small=True)
+                    elif self.game_over:
+                        if self.winner:
+                            self.ui.draw_text(f"Player {self.winner} Wins!", (WINDOW_WIDTH // 2 - 120, 20), RED)
+                        else:
+                            self.ui.draw_text("Draw!", (WINDOW_WIDTH // 2 - 60, 20), RED)
+                        # Draw the game over buttons
+                        self.draw_game_over_buttons()
+                    else:
+                        self.ui.draw_text(f"Player {self.current_player}'s Turn", (WINDOW_WIDTH - 250, 20), BLUE, small=True)
+                    if self.show_stats and self.last_stats is not None:
+                        self.ui.draw_stats(format_stats(self.last_stats))
+            elif self.game_mode is not None:
+                self.ui.draw_board()
 
             self.ui.update_display()
+            if self.show_stats and loop.time() - caption_time >= 1.0:
+                # Frame time goes in the window title so showing it does not itself force redraws
+                caption_time = loop.time()
+                average, worst = self.ui.frame_time()
+                pygame.display.set_caption(f"Gomoku 15x15 - redraw {average:.1f} ms avg, {worst:.1f} ms max, "
+                                           f"{self.ui.redraws} redraws")
 
-            # AI turn if it's AI's move and the game is not over
-            if not self.game_over and self.game_mode == "ai" and self.current_player == 2 and not self.ai_thinking:
-                await self.ai_turn()
-                self.current_player = 1
+            # Start the AI turn in the background if it's AI's move and the game is not over
+            if not self.game_over and self.game_mode == "ai" and self.current_player == 2 and self.ai_task is None:
+                self.ai_thinking = True
+                self.ai_task = asyncio.create_task(self.ai_turn())
 
-            await asyncio.sleep(0.01)  # Reduce delay to improve UI responsiveness
+            # Sleep for the rest of the frame so events and the AI task are served at the FPS target
+            await asyncio.sleep(max(0.0, 1 / FPS - (loop.time() - frame_start)))
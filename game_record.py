@@ -0,0 +1,378 @@
+import argparse
+import heapq
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+from gomoku_board import GRID_SIZE, SIDE_TO_MOVE_KEY, WIN_LENGTH, zobrist_keys
+from opening_book import canonical_key, symmetries
+
+RECORD_MAGIC = b"GMKR"
+INDEX_MAGIC = b"GMKI"
+RECORD_VERSION = 2
+FILE_HEADER = struct.Struct("<4sHHH")  # Magic, version, board size, win length
+RECORD = struct.Struct("<BH")  # Winner (0 for a draw or an unfinished game), number of moves; one byte per move follows
+INDEX_HEADER = struct.Struct("<4sHHQ")  # Magic, version, board size, entry count
+INDEX_ENTRY = struct.Struct("<QI")  # Canonical position key, offset of a record reaching the position
+MAX_MOVES = 0xFFFF
+MAX_SIZE = 16  # Largest board whose cells fit in the byte stored per move
+MAX_OFFSET = 0xFFFFFFFF  # Index entries address records in the first 4 GiB of a record file
+ANALYSIS_BATCH = 8192  # Positions evaluated per NumPy batch by analyze()
+INDEX_CHUNK = 1 << 20  # Index entries build_index() sorts in memory at once; more are merged from sorted runs on disk
+MERGE_BUFFER = 1 << 16  # Bytes read from each sorted run, and written to the index, at a time while merging
+
+_replay_tables = {}
+
+
+def encode_moves(moves, size=GRID_SIZE):
+    """Pack a sequence of (x, y) moves into one byte per move (the cell y * size + x)."""
+    return bytes(y * size + x for x, y in moves)
+
+
+def decode_moves(cells, size=GRID_SIZE):
+    """Unpack moves packed by encode_moves() into a list of (x, y)."""
+    return [(cell % size, cell // size) for cell in cells]
+
+
+class RecordWriter:
+    def __init__(self, path, size=GRID_SIZE, win_length=WIN_LENGTH):
+        """Appends games to a record file, creating it with its header if it does not exist.
+
+        A record file is a small header (with the board size and win length of its games) followed by
+        one record per game: the winner, the move count and one byte per move. Moves alternate from
+        player 1, as in every game this project plays, so colors are not stored, and boards of up to
+        MAX_SIZE x MAX_SIZE fit their cells in a byte.
+        """
+        if size > MAX_SIZE:
+            raise ValueError(f"a {size}x{size} board does not fit one byte per move")
+        self.size = size
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(FILE_HEADER.pack(RECORD_MAGIC, RECORD_VERSION, size, win_length))
+        else:
+            with open(path, "rb") as existing:
+                _check_header(existing.read(FILE_HEADER.size), RECORD_MAGIC, path, size, win_length)
+
+    def write(self, moves, winner=0):
+        """Append one game given as its (x, y) moves and its winner; return the record's offset."""
+        if len(moves) > MAX_MOVES:
+            raise ValueError(f"a record holds at most {MAX_MOVES} moves")
+        offset = self.file.tell()
+        self.file.write(RECORD.pack(winner, len(moves)) + encode_moves(moves, self.size))
+        return offset
+
+    def flush(self):
+        """Push the records written so far to the file."""
+        self.file.flush()
+
+    def close(self):
+        """Close the record file."""
+        self.file.close()
+
+
+def _check_header(data, magic, path, size=None, win_length=None):
+    """Validate a file header and return the (board size, win length) it declares."""
+    if len(data) < FILE_HEADER.size:
+        raise ValueError(f"{path} is too short to be a game file")
+    found, version, file_size, file_win_length = FILE_HEADER.unpack_from(data, 0)
+    if found != magic or version != RECORD_VERSION:
+        raise ValueError(f"{path} is not a version {RECORD_VERSION} {magic.decode()} file")
+    if size is not None and file_size != size:
+        raise ValueError(f"{path} holds {file_size}x{file_size} games, not {size}x{size}")
+    if win_length is not None and file_win_length != win_length:
+        raise ValueError(f"{path} holds games won by {file_win_length} in a row, not {win_length}")
+    return file_size, file_win_length
+
+
+class RecordFile:
+    def __init__(self, path):
+        """Read-only view of a record file through a memory mapping.
+
+        Iterating yields (offset, winner, moves) per game, where moves is the bytes of the record's
+        cells: one object per game and none per move, and the file is paged in as it is read rather
+        than loaded, so archives of millions of games stream in constant memory.
+        """
+        self.path = path
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size, self.win_length = _check_header(self.data, RECORD_MAGIC, path)
+
+    def __iter__(self):
+        data, unpack, header = self.data, RECORD.unpack_from, RECORD.size
+        offset, end = FILE_HEADER.size, len(data)
+        while offset < end:
+            winner, count = unpack(data, offset)
+            start = offset + header
+            yield offset, winner, data[start:start + count]
+            offset = start + count
+
+    def read(self, offset):
+        """Return (winner, moves) for the record at offset, with moves as (x, y) pairs."""
+        winner, count = RECORD.unpack_from(self.data, offset)
+        start = offset + RECORD.size
+        return winner, decode_moves(self.data[start:start + count], self.size)
+
+    def close(self):
+        """Unmap and close the record file."""
+        self.data.close()
+        self.file.close()
+
+
+def _replay_table(size):
+    """Per player and cell, the Zobrist keys of the stone in each of the 8 symmetric images of the board."""
+    if size not in _replay_tables:
+        zobrist = zobrist_keys(size)
+        maps = [forward for forward, _ in symmetries(size)]
+        _replay_tables[size] = [None] + [[tuple(zobrist[player][forward[cell]] for forward in maps)
+                                          for cell in range(size * size)] for player in (1, 2)]
+    return _replay_tables[size]
+
+
+def position_keys(moves, size=GRID_SIZE, plies=None):
+    """Canonical keys of the positions after each of the first plies moves (all by default).
+
+    The keys are those of opening_book.canonical_key() with the next player to move, so positions
+    are matched across the 8 board symmetries and a board can be looked up with the same function.
+    The 8 image hashes are updated with one XOR each per move; no board is built.
+    """
+    table = _replay_table(size)
+    hashes = [0] * 8
+    keys = []
+    player = 1
+    for cell in moves[:plies]:
+        stone = table[player][cell]
+        for symmetry in range(8):
+            hashes[symmetry] ^= stone[symmetry]
+        player = 3 - player
+        side = SIDE_TO_MOVE_KEY if player == 2 else 0
+        keys.append(min((h ^ side) or 1 for h in hashes))  # 0 is reserved, as in the opening book
+    return keys
+
+
+def _spill(entries, runs, directory):
+    """Sort a chunk of index entries (key << 32 | offset) and append it to runs as a temporary file."""
+    entries.sort()  # A game reaches each position once: every ply has one more stone
+    run = tempfile.TemporaryFile(dir=directory)
+    pack = INDEX_ENTRY.pack
+    run.write(b"".join(pack(entry >> 32, entry & MAX_OFFSET) for entry in entries))
+    run.seek(0)
+    runs.append(run)
+    entries.clear()
+
+
+def _read_run(run):
+    """Yield the (key, offset) entries of a sorted run, reading MERGE_BUFFER bytes at a time."""
+    block_size = MERGE_BUFFER - MERGE_BUFFER % INDEX_ENTRY.size
+    while True:
+        block = run.read(block_size)
+        if not block:
+            return
+        yield from INDEX_ENTRY.iter_unpack(block)
+
+
+def build_index(records_path, index_path, plies=None, chunk_size=INDEX_CHUNK):
+    """Write the index of a record file: every (position key, record offset) pair, sorted by key.
+
+    plies limits the positions indexed per game to its first plies moves, which is what opening
+    work needs and keeps the index of a large archive small. The entries are sorted chunk_size at a
+    time into temporary runs next to the index, which are then merged into it, so memory stays
+    bounded however large the archive. Returns the number of entries.
+    """
+    records = RecordFile(records_path)
+    size = records.size
+    directory = os.path.dirname(os.path.abspath(index_path))
+    entries, runs = [], []
+    count = 0
+    try:
+        for offset, _, moves in records:
+            if offset > MAX_OFFSET:
+                raise ValueError(f"{records_path} is too large to index past 4 GiB")
+            entries.extend(key << 32 | offset for key in position_keys(moves, size, plies))
+            if len(entries) >= chunk_size:
+                count += len(entries)
+                _spill(entries, runs, directory)
+        count += len(entries)
+        _spill(entries, runs, directory)
+        with open(index_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, RECORD_VERSION, size, count))
+            pack = INDEX_ENTRY.pack
+            block = []
+            for key, offset in heapq.merge(*(_read_run(run) for run in runs)):
+                block.append(pack(key, offset))
+                if len(block) * INDEX_ENTRY.size >= MERGE_BUFFER:
+                    f.write(b"".join(block))
+                    block.clear()
+            f.write(b"".join(block))
+    finally:
+        records.close()
+        for run in runs:
+            run.close()
+    return count
+
+
+class GameIndex:
+    def __init__(self, path):
+        """Read-only position index written by build_index(), searched in place through a memory mapping."""
+        self.path = path
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.count = INDEX_HEADER.unpack_from(self.data, 0)
+        if magic != INDEX_MAGIC or version != RECORD_VERSION:
+            raise ValueError(f"{path} is not a version {RECORD_VERSION} game index")
+
+    def __len__(self):
+        return self.count
+
+    def _key(self, i):
+        """Key of entry i."""
+        return INDEX_ENTRY.unpack_from(self.data, INDEX_HEADER.size + i * INDEX_ENTRY.size)[0]
+
+    def offsets(self, key):
+        """Offsets of the records that reach the position with the given canonical key."""
+        low, high = 0, self.count
+        while low < high:  # First entry with a key >= key
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        offsets = []
+        while low < self.count:
+            found, offset = INDEX_ENTRY.unpack_from(self.data, INDEX_HEADER.size + low * INDEX_ENTRY.size)
+            if found != key:
+                break
+            offsets.append(offset)
+            low += 1
+        return offsets
+
+    def lookup(self, board, player):
+        """Offsets of the records that reach board's position (in any symmetry) with player to move."""
+        if board.size != self.size:
+            return []
+        return self.offsets(canonical_key(board.snapshot()[1], self.size, player)[0])
+
+    def close(self):
+        """Unmap and close the index file."""
+        self.data.close()
+        self.file.close()
+
+
+def convert(jsonl_path, records_path, size=GRID_SIZE, win_length=WIN_LENGTH):
+    """Append the games of a selfplay.py JSONL file to a record file; return the number of games.
+
+    size and win_length are those the games were played with (selfplay.py --size and --win-length).
+    """
+    writer = RecordWriter(records_path, size, win_length)
+    games = 0
+    try:
+        with open(jsonl_path) as f:
+            for line in f:
+                record = json.loads(line)
+                writer.write(record["moves"], record["winner"])
+                games += 1
+    finally:
+        writer.close()
+    return games
+
+
+def analyze(records_path, plies=None, batch_size=ANALYSIS_BATCH):
+    """Evaluate every position of a record file with the NumPy batch evaluator.
+
+    Returns one (positions, decided, favorite_won) tuple per ply: how many games reached the ply,
+    how many of those had a winner, and in how many the side the evaluation favored after that
+    ply went on to win. Positions are replayed and scored batch_size at a time.
+    """
+    from batch_evaluator import available, evaluate_batch, np, replay_grids
+    if not available():
+        raise ImportError("analyze needs NumPy")
+    records = RecordFile(records_path)
+    totals = np.zeros((3, records.size * records.size + 1), dtype=np.int64)
+    pending, pending_winners = [], []
+
+    def flush():
+        scores = evaluate_batch(np.concatenate(pending), records.win_length)
+        winners = np.concatenate(pending_winners)
+        ply = np.concatenate([np.arange(len(grids)) for grids in pending])
+        favorite = np.where(scores > 0, 2, np.where(scores < 0, 1, 0))  # Scores are for player 2
+        length = totals.shape[1]
+        totals[0] += np.bincount(ply, minlength=length)
+        totals[1] += np.bincount(ply, weights=winners != 0, minlength=length).astype(np.int64)
+        totals[2] += np.bincount(ply, weights=(winners != 0) & (favorite == winners), minlength=length).astype(np.int64)
+        pending.clear()
+        pending_winners.clear()
+
+    try:
+        count = 0
+        for _, winner, moves in records:
+            grids = replay_grids(moves, records.size, plies)
+            pending.append(grids)
+            pending_winners.append(np.full(len(grids), winner, dtype=np.int64))
+            count += len(grids)
+            if count >= batch_size:
+                flush()
+                count = 0
+        if pending:
+            flush()
+    finally:
+        records.close()
+    last = int(np.flatnonzero(totals[0])[-1]) + 1 if totals[0].any() else 0
+    return [tuple(int(value) for value in totals[:, ply]) for ply in range(last)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert, index, search and analyze archives of binary game records.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("convert", help="append the games of a selfplay JSONL file to a record file")
+    command.add_argument("jsonl")
+    command.add_argument("records")
+    command.add_argument("--size", type=int, default=GRID_SIZE, help="board size of the games (selfplay.py --size)")
+    command.add_argument("--win-length", type=int, default=WIN_LENGTH,
+                         help="stones in a row that won the games (selfplay.py --win-length)")
+    command = commands.add_parser("index", help="build the position index of a record file")
+    command.add_argument("records")
+    command.add_argument("index")
+    command.add_argument("--plies", type=int, default=None, help="positions indexed per game (default: all)")
+    command = commands.add_parser("lookup", help="list the games that reach the position after some moves")
+    command.add_argument("records")
+    command.add_argument("index")
+    command.add_argument("moves", nargs="+", help="moves from player 1 as x,y (0-based)")
+    command = commands.add_parser("analyze", help="evaluate every position in NumPy batches, by ply (needs NumPy)")
+    command.add_argument("records")
+    command.add_argument("--plies", type=int, default=None, help="positions evaluated per game (default: all)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "convert":
+        try:
+            games = convert(args.jsonl, args.records, args.size, args.win_length)
+        except ValueError as error:  # Unsupported size, or games unlike those already in the file
+            parser.error(str(error))
+        print(f"{games} games appended to {args.records} ({os.path.getsize(args.records)} bytes)")
+    elif args.command == "index":
+        entries = build_index(args.records, args.index, args.plies)
+        print(f"{entries} positions indexed in {args.index} in {time.perf_counter() - start:.1f}s")
+    elif args.command == "analyze":
+        table = analyze(args.records, args.plies)
+        print(f"{'ply':>4} {'positions':>10} {'decided':>8} {'eval favorite won':>18}")
+        for ply, (positions, decided, favorite_won) in enumerate(table, 1):
+            share = f"{favorite_won / decided:.1%}" if decided else "-"
+            print(f"{ply:>4} {positions:>10} {decided:>8} {share:>18}")
+        positions = sum(row[0] for row in table)
+        print(f"{positions} positions in {time.perf_counter() - start:.1f}s")
+    else:
+        records, index = RecordFile(args.records), GameIndex(args.index)
+        moves = [tuple(int(c) for c in move.split(",")) for move in args.moves]
+        key = position_keys(encode_moves(moves, records.size), records.size)[-1]
+        for offset in index.offsets(key):
+            winner, game = records.read(offset)
+            print(json.dumps({"offset": offset, "winner": winner, "moves": [list(move) for move in game]},
+                             separators=(",", ":")))
+        records.close()
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+# Only engine modules are imported here: the server runs headless, without pygame
+from gomoku_board import AI_ALGORITHM, GRID_SIZE, board_class
+from opening_book import DEFAULT_BOOK_FILE
+from search_executor import SearchExecutor
+
+DEFAULT_PORT = 8765
+DEFAULT_TIME_LIMIT = 1.0  # Search budget per AI move, in seconds
+DEFAULT_DEADLINE = 5.0  # Seconds a request may take, queueing included, unless the request sets its own
+MIN_SEARCH_TIME = 0.05  # A request with less time than this left when its search would start is refused
+MAX_LINE = 64 * 1024  # Longest request line accepted
+
+
+class ServerBusy(Exception):
+    """Raised when a request arrives while the search queue is full."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's deadline passes before its search could start or finish."""
+
+
+class SearchFailed(Exception):
+    """Raised when a search ends without a move although the board still has empty cells."""
+
+
+class Session:
+    def __init__(self, session_id, backend, ai_player):
+        """One game hosted by the server: its board, whose turn it is and which color the AI plays."""
+        self.id = session_id
+        self.board = board_class(backend)(GRID_SIZE)
+        self.ai_player = ai_player
+        self.to_move = 1
+        self.moves = 0
+
+    def state(self):
+        """The session as a JSON-serializable dict."""
+        return {"session": self.id, "to_move": self.to_move, "winner": self.board.winner, "moves": self.moves,
+                "last_move": list(self.board.last_move) if self.board.last_move else None}
+
+    def play(self, x, y, player):
+        """Apply a move; return False if it is illegal or out of turn."""
+        if self.board.winner or player != self.to_move or not self.board.make_move(x, y, player):
+            return False
+        self.moves += 1
+        self.to_move = 3 - player
+        return True
+
+
+class GameServer:
+    def __init__(self, workers=1, max_queue=16, max_sessions=1000, time_limit=DEFAULT_TIME_LIMIT,
+                 backend="list"):
+        """Headless server hosting many concurrent games over a newline-delimited JSON protocol.
+
+        AI searches run in a SearchExecutor with workers processes. At most workers searches run at
+        once; up to max_queue more wait for a slot, and any request beyond that is refused at once
+        with a "busy" error instead of queueing without bound, so clients see the overload and can back
+        off. Each request has a deadline (the request's "deadline" in seconds, or DEFAULT_DEADLINE)
+        that covers its time in the queue: the search budget is cut to what is left, and a request
+        that has waited past its deadline, or whose search does not answer by then, is answered with
+        a "deadline" error and can be retried with "ai_move".
+        """
+        self.executor = SearchExecutor(max_workers=workers, backend=backend)
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_sessions = max_sessions
+        self.time_limit = time_limit
+        self.backend = backend
+        self.slots = None  # asyncio.Semaphore with one slot per search that may run at once, made by serve()
+        self.waiting = 0  # Searches queued for a slot
+        self.running = 0
+        self.sessions = {}
+        self.session_ids = itertools.count(1)
+        self.counters = {"requests": 0, "searches": 0, "busy": 0, "deadline": 0, "failed": 0}
+
+    async def ai_move(self, session, deadline):
+        """Search and play the AI's move in a session, queueing for a worker slot first.
+
+        Raises ServerBusy if the queue is full, DeadlineExceeded if the deadline passes before the
+        search answers and SearchFailed if it answers without a move on a board that is not full.
+        """
+        if self.waiting + self.running >= self.workers + self.max_queue:
+            self.counters["busy"] += 1
+            raise ServerBusy()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.slots.acquire(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self.counters["deadline"] += 1
+            raise DeadlineExceeded() from None
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            remaining = deadline - time.monotonic()
+            if remaining < MIN_SEARCH_TIME:
+                self.counters["deadline"] += 1
+                raise DeadlineExceeded()
+            # Leave the worker a quarter of the remaining time (at most a second) to answer
+            time_limit = min(self.time_limit, remaining - min(1.0, remaining / 4))
+            self.counters["searches"] += 1
+            try:
+                move = await self.executor.search(session.board, remaining, game_id=session.id,
+                                                  time_limit=time_limit, player=session.ai_player,
+                                                  algorithm=AI_ALGORITHM, book=DEFAULT_BOOK_FILE)
+            except asyncio.TimeoutError:
+                # No search on the event loop as a fallback: it would stall every connection under load
+                self.counters["deadline"] += 1
+                raise DeadlineExceeded() from None
+        finally:
+            self.running -= 1
+            self.slots.release()
+        if move is None:
+            if 0 in session.board.snapshot()[1]:
+                self.counters["failed"] += 1
+                raise SearchFailed()
+            return None  # Full board: the game is drawn
+        session.play(move[0], move[1], session.ai_player)
+        return move
+
+    async def handle_request(self, request, sessions):
+        """Answer one request; sessions is the set of session ids opened on this connection.
+
+        Requests are JSON objects with an "op" and optionally an "id" (echoed back) and a "deadline":
+        {"op": "new", "ai_player": 1 or 2} starts a game, {"op": "move", "session", "x", "y"} plays the
+        client's move and answers with the AI's reply ("ai_move"), {"op": "ai_move", "session"} asks
+        for the AI's move when it is the AI's turn (its first move when it plays 1, or a retry after a
+        "busy" or "deadline" error), and "state", "close" and "stats" report on and end sessions.
+        Errors are answered as {"error": ...}.
+        """
+        op = request.get("op")
+        deadline = time.monotonic() + float(request.get("deadline", DEFAULT_DEADLINE))
+        if op == "new":
+            if len(self.sessions) >= self.max_sessions:
+                return {"error": "too many sessions"}
+            session = Session(next(self.session_ids), self.backend, int(request.get("ai_player", 2)))
+            self.sessions[session.id] = session
+            sessions.add(session.id)
+            return session.state()
+        if op == "stats":
+            return {"sessions": len(self.sessions), "running": self.running, "waiting": self.waiting,
+                    **self.counters}
+
+        if op not in ("state", "close", "move", "ai_move"):
+            return {"error": f"unknown op {op!r}"}
+        session = self.sessions.get(request.get("session"))
+        if session is None or session.id not in sessions:
+            return {"error": "unknown session"}
+        if op == "state":
+            return session.state()
+        if op == "close":
+            del self.sessions[session.id]
+            sessions.discard(session.id)
+            self.executor.end_game(session.id)
+            return {"closed": session.id}
+        if op == "move":
+            if not session.play(int(request["x"]), int(request["y"]), 3 - session.ai_player):
+                return {"error": "illegal move", **session.state()}
+            response = {}
+            if not session.board.winner:
+                response["ai_move"] = await self.ai_move(session, deadline)
+            response.update(session.state())
+            return response
+        # op == "ai_move"
+        if session.board.winner or session.to_move != session.ai_player:
+            return {"error": "not the AI's turn", **session.state()}
+        move = await self.ai_move(session, deadline)
+        return {"ai_move": move, **session.state()}
+
+    async def handle_connection(self, reader, writer):
+        """Serve one client: one JSON request per line, answered in order with one JSON line each."""
+        sessions = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # Line longer than MAX_LINE
+                    break
+                if not line:
+                    break
+                self.counters["requests"] += 1
+                request = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("request must be a JSON object")
+                    response = await self.handle_request(request, sessions)
+                except ServerBusy:
+                    response = {"error": "busy"}
+                except DeadlineExceeded:
+                    response = {"error": "deadline"}
+                except SearchFailed:
+                    response = {"error": "search failed"}
+                except (ValueError, KeyError, TypeError) as error:
+                    response = {"error": "bad request", "detail": str(error)}
+                if isinstance(request, dict) and "id" in request:
+                    response["id"] = request["id"]
+                writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+                await writer.drain()  # Stop reading from a client that does not read its answers
+        except ConnectionError:
+            pass
+        finally:
+            for session_id in sessions:  # A connection's games end with it
+                self.sessions.pop(session_id, None)
+                self.executor.end_game(session_id)
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT, unix=None):
+        """Listen on TCP host:port, or on the Unix socket path unix, until cancelled."""
+        self.slots = asyncio.Semaphore(self.workers)  # Created here so it belongs to the running loop
+        if unix is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, unix, limit=MAX_LINE)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve many concurrent Gomoku games against the AI.")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port to listen on")
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=1, help="search worker processes")
+    parser.add_argument("--max-queue", type=int, default=16, help="searches that may wait for a worker")
+    parser.add_argument("--max-sessions", type=int, default=1000, help="games hosted at once")
+    parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT, help="search seconds per AI move")
+    parser.add_argument("--backend", default="list", help="board backend: list or bitboard")
+    args = parser.parse_args()
+
+    server = GameServer(args.workers, args.max_queue, args.max_sessions, args.time_limit, args.backend)
+    print(f"listening on {args.unix or f'{args.host}:{args.port}'} with {args.workers} worker(s)", flush=True)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
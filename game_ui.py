@@ -1,6 +1,11 @@
+import time
+from collections import deque
+
 import pygame
 from gomoku_board import CELL_SIZE, GRID_SIZE, OFFSET_X, OFFSET_Y, WHITE, GRAY, BLACK, LIGHT_GRAY, RED
 
+FRAME_SAMPLES = 120  # Redraws kept for the frame time figures
+
 class GameUI:
     def __init__(self, screen, board):
         # Initialize UI with screen, board, and fonts
@@ -9,20 +14,34 @@ class GameUI:
         self.font = pygame.font.SysFont(None, 48)
         self.small_font = pygame.font.SysFont(None, 30)
 
-    def draw_board(self):
-        # Fill screen with white color as background
-        self.screen.fill(WHITE)
+        # The static board (background, grid, labels) is rendered once; the board layer is a copy
+        # of it with the stones on top, updated one cell at a time as stones come and go
+        self.background = self.render_background()
+        self.board_layer = self.background.copy()
+        self.stone_sprites = self.render_stone_sprites()
+        self.drawn_stones = {}  # (x, y) -> sprite key of the stones currently on the board layer
+        self.drawn_position = None  # (board hash, last move) the board layer shows
+        self.scene = None  # Everything besides the stones that the screen shows, as set by begin_frame()
+        self.dirty_rects = []  # Screen areas changed since the last update_display()
+        self.frame_start = None
+        self.frame_times = deque(maxlen=FRAME_SAMPLES)  # Seconds per redraw, drawing and display update
+        self.redraws = 0
+
+    def render_background(self):
+        # Render the empty board: white background, grid lines and row and column labels
+        background = pygame.Surface(self.screen.get_size()).convert()
+        background.fill(WHITE)
 
         # Draw grid lines
         for i in range(GRID_SIZE):
             pygame.draw.line(
-                self.screen, GRAY,
+                background, GRAY,
                 (OFFSET_X + CELL_SIZE // 2, OFFSET_Y + CELL_SIZE // 2 + i * CELL_SIZE),
                 (OFFSET_X + CELL_SIZE // 2 + (GRID_SIZE - 1) * CELL_SIZE, OFFSET_Y + CELL_SIZE // 2 + i * CELL_SIZE),
                 2
             )
             pygame.draw.line(
-                self.screen, GRAY,
+                background, GRAY,
                 (OFFSET_X + CELL_SIZE // 2 + i * CELL_SIZE, OFFSET_Y + CELL_SIZE // 2),
                 (OFFSET_X + CELL_SIZE // 2 + i * CELL_SIZE, OFFSET_Y + CELL_SIZE // 2 + (GRID_SIZE - 1) * CELL_SIZE),
                 2
@@ -32,39 +51,79 @@ class GameUI:
         for i in range(GRID_SIZE):
             label = self.small_font.render(str(i + 1), True, BLACK)
             label_rect_h = label.get_rect(center=(OFFSET_X + CELL_SIZE // 2 + i * CELL_SIZE, OFFSET_Y - 30))
-            self.screen.blit(label, label_rect_h)
+            background.blit(label, label_rect_h)
 
             label_rect_v = label.get_rect(center=(OFFSET_X - 30, OFFSET_Y + CELL_SIZE // 2 + i * CELL_SIZE))
-            self.screen.blit(label, label_rect_v)
+            background.blit(label, label_rect_v)
+        return background
+
+    def render_stone_sprites(self):
+        # Render the black and white pieces, plain and with the red last-move ring, keyed by (piece, is last move)
+        sprites = {}
+        center = (CELL_SIZE // 2, CELL_SIZE // 2)
+        for piece, color in ((1, BLACK), (2, LIGHT_GRAY)):
+            for last in (False, True):
+                sprite = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA).convert_alpha()
+                pygame.draw.circle(sprite, color, center, CELL_SIZE // 2 - 4)
+                if last:
+                    pygame.draw.circle(sprite, RED, center, CELL_SIZE // 2 - 4, 2)
+                sprites[piece, last] = sprite
+        return sprites
+
+    def cell_rect(self, x, y):
+        # Screen area of a board cell
+        return pygame.Rect(OFFSET_X + x * CELL_SIZE, OFFSET_Y + y * CELL_SIZE, CELL_SIZE, CELL_SIZE)
 
-        # Draw the game pieces (black or white)
+    def begin_frame(self, scene):
+        # Start a frame; scene describes everything on screen besides the stones (mode, status text,
+        # overlays). Returns True if it changed, in which case the caller redraws the whole frame;
+        # otherwise only draw_board() is needed, and it touches nothing unless a stone changed.
+        self.frame_start = time.perf_counter()
+        if scene == self.scene:
+            return False
+        self.scene = scene
+        self.dirty_rects = [self.screen.get_rect()]
+        return True
+
+    def invalidate(self):
+        # Force a full redraw on the next frame (the window was uncovered or restored)
+        self.scene = None
+
+    def update_board_layer(self):
+        # Bring the board layer up to date with the board; return the screen areas of the changed cells
+        position = (self.board.hash, self.board.last_move)
+        if position == self.drawn_position:
+            return []
+        self.drawn_position = position
+        changed = []
+        grid = self.board.grid
+        last_move = self.board.last_move
         for y in range(GRID_SIZE):
+            row = grid[y]
             for x in range(GRID_SIZE):
-                piece = self.board.grid[y][x]
-                if piece == 1:
-                    # Draw black piece
-                    pygame.draw.circle(self.screen, BLACK,
-                        (OFFSET_X + x * CELL_SIZE + CELL_SIZE // 2,
-                         OFFSET_Y + y * CELL_SIZE + CELL_SIZE // 2),
-                        CELL_SIZE // 2 - 4)
-                    # Highlight last move with a red circle around the piece
-                    if self.board.last_move == (x, y):
-                        pygame.draw.circle(self.screen, RED,
-                            (OFFSET_X + x * CELL_SIZE + CELL_SIZE // 2,
-                             OFFSET_Y + y * CELL_SIZE + CELL_SIZE // 2),
-                            CELL_SIZE // 2 - 4, 2)
-                elif piece == 2:
-                    # Draw white piece
-                    pygame.draw.circle(self.screen, LIGHT_GRAY,
-                        (OFFSET_X + x * CELL_SIZE + CELL_SIZE // 2,
-                         OFFSET_Y + y * CELL_SIZE + CELL_SIZE // 2),
-                        CELL_SIZE // 2 - 4)
-                    # Highlight last move with a red circle around the piece
-                    if self.board.last_move == (x, y):
-                        pygame.draw.circle(self.screen, RED,
-                            (OFFSET_X + x * CELL_SIZE + CELL_SIZE // 2,
-                             OFFSET_Y + y * CELL_SIZE + CELL_SIZE // 2),
-                            CELL_SIZE // 2 - 4, 2)
+                piece = row[x]
+                key = (piece, (x, y) == last_move) if piece else None
+                if self.drawn_stones.get((x, y)) != key:
+                    rect = self.cell_rect(x, y)
+                    self.board_layer.blit(self.background, rect, rect)
+                    if key is None:
+                        del self.drawn_stones[x, y]
+                    else:
+                        self.board_layer.blit(self.stone_sprites[key], rect)
+                        self.drawn_stones[x, y] = key
+                    changed.append(rect)
+        return changed
+
+    def draw_board(self, full=False):
+        # Draw the board with its stones: the whole board layer when full is True (a new scene),
+        # otherwise only the cells whose stones changed since the last frame
+        changed = self.update_board_layer()
+        if full:
+            self.screen.blit(self.board_layer, (0, 0))
+        else:
+            for rect in changed:
+                self.screen.blit(self.board_layer, rect, rect)
+            self.dirty_rects.extend(changed)
 
     def draw_text(self, text, pos, color=BLACK, small=False):
         # Draw text on the screen at the specified position
@@ -72,6 +131,28 @@ class GameUI:
         render = font.render(text, True, color)
         self.screen.blit(render, pos)
 
+    def draw_stats(self, lines):
+        # Draw search statistics in a translucent panel over the top-left corner of the board
+        line_height = self.small_font.get_linesize()
+        renders = [self.small_font.render(line, True, BLACK) for line in lines]
+        panel = pygame.Surface((max(render.get_width() for render in renders) + 20, line_height * len(renders) + 10),
+                               pygame.SRCALPHA)
+        panel.fill((255, 255, 255, 200))
+        for i, render in enumerate(renders):
+            panel.blit(render, (10, 5 + i * line_height))
+        self.screen.blit(panel, (OFFSET_X, OFFSET_Y))
+
+    def frame_time(self):
+        # Average and worst redraw time in milliseconds over the last FRAME_SAMPLES redraws
+        if not self.frame_times:
+            return 0.0, 0.0
+        return 1000 * sum(self.frame_times) / len(self.frame_times), 1000 * max(self.frame_times)
+
     def update_display(self):
-        # Update the screen display
-        pygame.display.flip()
+        # Push the changed areas to the display; a frame where nothing changed costs nothing
+        if self.dirty_rects:
+            pygame.display.update(self.dirty_rects)
+            self.dirty_rects = []
+            self.redraws += 1
+            if self.frame_start is not None:
+                self.frame_times.append(time.perf_counter() - self.frame_start)
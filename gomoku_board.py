@@ -1,8 +1,11 @@
-import pygame
 import sys
-import asyncio
 import platform
 import copy
+import time
+import random
+
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from evaluator import PatternEvaluator, WALL, WIN_LENGTH
 
 # Constants for cell size, grid size, and window dimensions
 CELL_SIZE = 60
@@ -25,206 +28,786 @@ YELLOW = (255, 255, 0)
 # Frames per second for the game
 FPS = 60
 MAX_DEPTH = 2  # Maximum depth for Minimax algorithm
+AI_TIME_LIMIT = 2.0  # Seconds the AI may spend searching a move (iterative deepening budget)
+AI_TIME_GRACE = 1.0  # Extra seconds the game waits for the worker before searching locally
+AI_ALGORITHM = "pvs"  # Search algorithm the game's AI uses (see ALGORITHMS)
+MAX_ITERATIVE_DEPTH = 10  # Deepest iteration iterative deepening will attempt
+WIN_SCORE = 100000  # Score of a won position for the AI's side
+CANCEL_CHECK_INTERVAL = 256  # Nodes searched between checks for a cancelled search
+ZOBRIST_SEED = 0x60A0C0  # Fixed seed so hashes agree between processes and runs
+CANDIDATE_RADIUS = 2  # Empty cells within this many cells (any direction) of a stone are candidate moves
+FORCING_SCORE = 5000  # Local threat score (a four with an open end, or better) that orders a move ahead of the killers
+KILLER_SLOTS = 2  # Killer moves remembered per ply
+ALGORITHMS = ("minimax", "pvs")  # Search algorithms AIPlayer can run
+ASPIRATION_WINDOW = 5000  # Half-width of the first PVS root window around the score two iterations back
+MIN_WIN_LENGTH = 4  # Shortest winning line the evaluator and threat search handle (threats are 1-3 stones short)
+
+_zobrist_cache = {}
+_neighborhood_cache = {}
+_layout_cache = {}
+
+
+def zobrist_keys(size):
+    """Return the Zobrist keys for a board size as keys[player][y * size + x] (player 1 or 2)."""
+    if size not in _zobrist_cache:
+        rng = random.Random(ZOBRIST_SEED + size)
+        _zobrist_cache[size] = [None] + [[rng.getrandbits(64) for _ in range(size * size)] for _ in range(2)]
+    return _zobrist_cache[size]
+
+
+def neighborhoods(size, radius=CANDIDATE_RADIUS):
+    """Return, for each cell index y * size + x, the (index, (x, y)) pairs of the cells within radius of it."""
+    if (size, radius) not in _neighborhood_cache:
+        cells = []
+        for y in range(size):
+            for x in range(size):
+                cells.append([((y + dy) * size + x + dx, (x + dx, y + dy))
+                              for dy in range(-radius, radius + 1) for dx in range(-radius, radius + 1)
+                              if 0 <= x + dx < size and 0 <= y + dy < size])
+        _neighborhood_cache[(size, radius)] = cells
+    return _neighborhood_cache[(size, radius)]
+
+
+def padded_layout(size):
+    """Return (stride, empty cells, direction steps, cell order) for the flat board of a size.
+
+    Cell (x, y) is at (y + 1) * stride + x + 1 in a flat array with stride = size + 1: a row of WALL
+    sentinels above and below the board and one sentinel column between rows, so a walk along any
+    direction stops at a sentinel before it leaves the board and needs no bounds checks. The steps
+    move one cell horizontally, vertically and along both diagonals; cell order maps (x, y) to its
+    row-major rank, for sorting moves without building key tuples.
+    """
+    if size not in _layout_cache:
+        stride = size + 1
+        empty = bytearray([WALL]) * ((size + 2) * stride + 1)
+        for y in range(size):
+            start = (y + 1) * stride + 1
+            empty[start:start + size] = bytes(size)
+        order = {(x, y): y * size + x for y in range(size) for x in range(size)}
+        _layout_cache[size] = (stride, bytes(empty), (1, stride, stride + 1, stride - 1), order)
+    return _layout_cache[size]
+
+
+# XORed into a hash when player 2 is the side to move
+SIDE_TO_MOVE_KEY = random.Random(ZOBRIST_SEED).getrandbits(64)
+
+
+class SearchCancelled(Exception):
+    """Raised inside the search when the caller has abandoned it."""
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the iterative deepening time budget runs out."""
+
+
+def board_class(backend="list"):
+    """Return the board class for a backend name: "list" (GomokuBoard) or "bitboard" (BitboardBoard)."""
+    if backend == "list":
+        return GomokuBoard
+    if backend == "bitboard":
+        from bitboard import BitboardBoard
+        return BitboardBoard
+    raise ValueError(f"Unknown board backend: {backend!r}")
+
 
 class GomokuBoard:
-    def __init__(self, size):
-        """Initialize the Gomoku board with a given size."""
+    __slots__ = ("size", "win_length", "stride", "empty", "steps", "cell_order", "cells", "last_move", "move_history",
+                 "zobrist", "hash", "winner", "winning_move", "neighborhoods", "near_counts", "candidates")
+
+    def __init__(self, size, win_length=WIN_LENGTH):
+        """Initialize the Gomoku board with a given size and the number of stones in a row that wins.
+
+        Stones live in one flat bytearray with sentinel borders (see padded_layout); grid is a
+        row-major copy for display and tests.
+        """
         self.size = size
-        self.grid = [[0 for _ in range(size)] for _ in range(size)]  # Create an empty board
+        self.win_length = win_length
+        self.stride, self.empty, self.steps, self.cell_order = padded_layout(size)
+        self.cells = bytearray(self.empty)  # Stones by padded position, WALL sentinels around the board
         self.last_move = None  # Track the last move made
+        self.zobrist = zobrist_keys(size)
+        self.hash = 0  # Zobrist hash of the stones on the board, updated incrementally
+        self.winner = 0  # Player with win_length in a row, kept up to date by place() and undo()
+        self.winning_move = None  # The stone that completed the line
+        self.neighborhoods = neighborhoods(size)
+        self.near_counts = [0] * (size * size)  # Stones within CANDIDATE_RADIUS of each cell (itself included)
+        self.candidates = set()  # Empty cells with a stone within CANDIDATE_RADIUS, kept by place() and undo()
+        self.move_history = []  # Moves made with make_move(), in order; undo_move() takes back the last
 
     def reset(self):
         """Reset the board to its initial state."""
-        self.grid = [[0 for _ in range(self.size)] for _ in range(self.size)]
+        self.cells = bytearray(self.empty)
         self.last_move = None
+        self.move_history = []
+        self.hash = 0
+        self.winner = 0
+        self.winning_move = None
+        self.near_counts = [0] * (self.size * self.size)
+        self.candidates = set()
+
+    @property
+    def grid(self):
+        """Row-major grid[y][x] view of the board, built on each access (read-only)."""
+        cells, stride, size = self.cells, self.stride, self.size
+        return [list(cells[(y + 1) * stride + 1:(y + 1) * stride + 1 + size]) for y in range(size)]
+
+    def snapshot(self):
+        """Pack the board into a compact, picklable snapshot (size, one byte per cell, last move, win length)."""
+        cells, stride, size = self.cells, self.stride, self.size
+        return (size, b"".join(cells[(y + 1) * stride + 1:(y + 1) * stride + 1 + size] for y in range(size)),
+                self.last_move, self.win_length)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Rebuild a board from a snapshot produced by snapshot()."""
+        size, cells, last_move, win_length = snapshot
+        board = cls(size, win_length)
+        for index, cell in enumerate(cells):
+            if cell:
+                board.place(index % size, index // size, cell)
+        board.last_move = last_move
+        return board
 
     def is_valid_move(self, x, y):
         """Check if a move is valid by ensuring the coordinates are within bounds and the cell is empty."""
-        return 0 <= x < self.size and 0 <= y < self.size and self.grid[y][x] == 0
+        return 0 <= x < self.size and 0 <= y < self.size and self.cells[(y + 1) * self.stride + x + 1] == 0
 
     def make_move(self, x, y, player):
         """Make a move for a player (1 or 2) on the board at the specified coordinates."""
         if self.is_valid_move(x, y):
-            self.grid[y][x] = player
+            self.place(x, y, player)
             self.last_move = (x, y)
+            self.move_history.append(self.last_move)
             return True
         return False
 
+    def undo_move(self):
+        """Take back the last move made with make_move() and return it, or None if there is none."""
+        if not self.move_history:
+            return None
+        x, y = self.move_history.pop()
+        self.undo(x, y)
+        self.last_move = self.move_history[-1] if self.move_history else None
+        return x, y
+
+    def place(self, x, y, player):
+        """Put a stone on an empty cell without validation; used by the search for trial moves.
+
+        Only the lines through the new stone are checked for five in a row, and only the cells within
+        CANDIDATE_RADIUS of it have their candidate counts updated, so both stay current at a constant
+        cost per move.
+        """
+        index = y * self.size + x
+        self.cells[(y + 1) * self.stride + x + 1] = player
+        self.hash ^= self.zobrist[player][index]
+        near_counts = self.near_counts
+        for near, cell in self.neighborhoods[index]:
+            near_counts[near] += 1
+            if near_counts[near] == 1:  # A cell with no stone nearby is empty unless it is this one
+                self.candidates.add(cell)
+        self.candidates.discard((x, y))
+        if not self.winner and self.check_win(x, y, player):
+            self.winner = player
+            self.winning_move = (x, y)
+
+    def undo(self, x, y):
+        """Remove the stone placed by place()."""
+        index = y * self.size + x
+        position = (y + 1) * self.stride + x + 1
+        self.hash ^= self.zobrist[self.cells[position]][index]
+        self.cells[position] = 0
+        near_counts = self.near_counts
+        for near, cell in self.neighborhoods[index]:
+            near_counts[near] -= 1
+            if near_counts[near] == 0:
+                self.candidates.discard(cell)
+        if near_counts[index]:
+            self.candidates.add((x, y))
+        if self.winning_move == (x, y):
+            self.winner = 0
+            self.winning_move = None
+
     def check_win(self, x, y, player):
-        """Check if the specified player has won the game by forming a line of 5 consecutive pieces."""
-        def count(dx, dy):
-            """Count consecutive pieces in a given direction."""
-            cnt = 0
-            nx, ny = x + dx, y + dy
-            while 0 <= nx < self.size and 0 <= ny < self.size and self.grid[ny][nx] == player:
-                cnt += 1
-                nx += dx
-                ny += dy
-            return cnt
-
-        # Define directions to check: horizontal, vertical, and diagonal lines
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
-        for dx, dy in directions:
-            if count(dx, dy) + count(-dx, -dy) + 1 >= 5:
+        """Check if the specified player has win_length stones in a row through (x, y).
+
+        Walks both ways along each direction from the cell; the sentinels around the board end every
+        walk, so there are no bounds checks.
+        """
+        cells = self.cells
+        position = (y + 1) * self.stride + x + 1
+        needed = self.win_length - 1  # Stones besides (x, y)
+        for step in self.steps:
+            run = 0
+            cell = position + step
+            while cells[cell] == player:
+                run += 1
+                cell += step
+            cell = position - step
+            while cells[cell] == player:
+                run += 1
+                cell -= step
+            if run >= needed:
                 return True
         return False
 
-    def get_nearby_cells(self):
-        """Get a list of cells that are near the last move or empty cells if no move has been made."""
-        cells = set()
-        if self.last_move:
-            x, y = self.last_move
-            for dy in [-2, -1, 0, 1, 2]:
-                for dx in [-2, -1, 0, 1, 2]:
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < self.size and 0 <= ny < self.size and self.grid[ny][nx] == 0:
-                        cells.add((nx, ny))
-        else:
-            for y in range(self.size):
-                for x in range(self.size):
-                    if self.grid[y][x] != 0:
-                        for dy in [-2, -1, 0, 1, 2]:
-                            for dx in [-2, -1, 0, 1, 2]:
-                                nx, ny = x + dx, y + dy
-                                if 0 <= nx < self.size and 0 <= ny < self.size and self.grid[ny][nx] == 0:
-                                    cells.add((nx, ny))
-        return list(cells) if cells else [(self.size // 2, self.size // 2)]  # Return the center if no nearby cells
+    def get_nearby_cells(self, out=None):
+        """Get the empty cells within CANDIDATE_RADIUS of any stone, or the center on an empty board.
+
+        Cells come in row-major order, independent of set iteration order, so searches are reproducible.
+        The search passes one list per ply as out, which is refilled instead of allocating a new one.
+        """
+        if out is None:
+            out = []
+        if not self.candidates:
+            out.clear()
+            out.append((self.size // 2, self.size // 2))
+            return out
+        out[:] = self.candidates
+        out.sort(key=self.cell_order.__getitem__)
+        return out
 
 class AIPlayer:
-    def __init__(self, board, depth=MAX_DEPTH):
-        """Initialize the AI player with a reference to the board and search depth for Minimax."""
+    def __init__(self, board, depth=MAX_DEPTH, time_limit=None, table=None, threat_search=True, player=2,
+                 stats=False, algorithm="minimax", book=None, root_eval=False):
+        """Initialize the AI player with a reference to the board and search depth for Minimax.
+
+        player is the color the AI plays (2 in the game; either color in AI-vs-AI play). Scores are
+        from that player's point of view, so a transposition table must not be shared between colors.
+
+        With a time_limit (seconds) the AI uses iterative deepening instead of a fixed depth:
+        it searches depth 1, 2, 3... up to MAX_ITERATIVE_DEPTH until the budget runs out.
+        The transposition table is kept between calls, so reuse one AIPlayer (or pass the same
+        table) for a whole game to let later moves reuse earlier analysis.
+
+        algorithm picks the search: "minimax" (the original two-branch minimax with alpha-beta) or
+        "pvs" (negamax principal variation search, with aspiration windows under iterative deepening).
+        Both return the same scores, so their moves and node counts can be compared directly.
+
+        book is the path of an opening book file (see opening_book.py); positions found in it are
+        answered from the book without searching. A missing file just disables the book.
+
+        root_eval=True orders the quiet root moves by the static evaluation of the position after each
+        (scored in one batch with NumPy when it is installed, see batch_evaluator.py) instead of by
+        their local threat and history scores.
+
+        With stats=True each search is profiled by a SearchStats (see search_stats.py) and the result
+        is left in last_stats; without it the search runs uninstrumented.
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown search algorithm: {algorithm!r}")
+        if board.win_length < MIN_WIN_LENGTH:
+            raise ValueError(f"The AI needs a win length of at least {MIN_WIN_LENGTH}, not {board.win_length}")
         self.board = board
+        self.algorithm = algorithm
         self.depth = depth
+        self.time_limit = time_limit
+        self.player = player
+        self.opponent = 3 - player
+        self.table = table if table is not None else TranspositionTable()
+        self.evaluator = PatternEvaluator(board.size, board.win_length)
+        self.nodes = 0  # Nodes visited by the current search
+        self.leaves = 0  # Positions scored by evaluate() at the search horizon
+        self.cutoffs = 0  # Alpha-beta cutoffs
+        self.first_move_cutoffs = 0  # Cutoffs caused by the first move searched at a node
+        self.should_stop = None  # Optional callable polled during search; returning True aborts it
+        self.deadline = None  # perf_counter() value at which the running iteration is abandoned
+        self.completed_depth = 0  # Depth of the last fully searched iteration
+        self.pv = []  # Principal variation of the last completed iteration, used for move ordering
+        self.pv_lines = {}  # Best line found below each ply during the running iteration
+        self.line = []  # Trial moves from the root to the node being searched
+        self.use_threat_search = threat_search  # Look for forced wins with ThreatSearch before minimax
+        self.threat_nodes = 0  # Nodes the threat search expanded for the current move
+        self.search_start = None  # perf_counter() when get_best_move started; the time budget counts from here
+        self.killers = []  # killers[ply]: the last moves that caused a cutoff at that ply, newest first
+        self.history = [None] + [[0] * (board.size * board.size) for _ in range(2)]  # [player][y * size + x]
+        self.collect_stats = stats
+        self.book = book
+        self.book_move = False  # True if the last move came from the opening book
+        self.last_stats = None  # SearchStats.as_dict() of the last search, when collect_stats is set
+        self.root_eval = root_eval
+        self.root_scores = {}  # Root move -> static evaluation after it, computed once per search when root_eval is set
+        # Move lists reused from node to node instead of allocated per node: per ply, the candidate
+        # moves and their searched order; and scratch space order_moves() empties on every call
+        self.ply_candidates = []
+        self.ply_moves = []
+        self.move_scores = {}
+        self.forcing_moves = []
+        self.quiet_moves = []
 
-    def order_moves(self, moves):
-        """Order possible moves by priority, considering central position, distance from last move, and threat evaluation."""
-        ordered = []
+    def order_moves(self, moves, ply=None, hash_move=None, player=None):
+        """Order the moves of player (the side to move, the AI by default) so the best are searched first.
+
+        In order: the previous iteration's principal variation move (at nodes on that variation), the
+        transposition table's best move (hash_move), moves that make or stop a four (local threat score
+        of FORCING_SCORE or more), this ply's killer moves, then everything else by local threat score
+        plus history score. The threat score counts both what the stone builds for player and what it
+        blocks of the opponent, and is read from the evaluator's line codes without placing anything.
+        Among forcing moves player's own threat counts double, so making a five comes before blocking
+        one, and making a four before blocking one.
+        With root_eval the root's quiet moves are ordered by score_root_moves() instead.
+
+        With a ply the result is that ply's reused list, valid until the next call for the same ply.
+        """
+        if player is None:
+            player = self.player
+        size = self.board.size
+        history = self.history[player]
+        threat_scores = self.evaluator.threat_scores
+        pv_move = None
+        if ply is not None and ply < len(self.pv) and self.line == self.pv[:ply]:
+            pv_move = self.pv[ply]  # Only while following the previous principal variation
+        if hash_move == pv_move:
+            hash_move = None
+        killers = self.killers[ply] if ply is not None and ply < len(self.killers) else ()
+        root_scores = None
+        if ply == 0 and self.root_eval and player == self.player:
+            if not self.root_scores:  # The root position is the same for every iteration of a search
+                self.root_scores = self.score_root_moves(moves)
+            root_scores = self.root_scores
+        scores, forcing, quiet = self.move_scores, self.forcing_moves, self.quiet_moves
+        scores.clear()
+        forcing.clear()
+        quiet.clear()
+        for move in moves:
+            if move == pv_move or move == hash_move:
+                scores[move] = 0  # Present; searched first whatever its score
+                continue
+            x, y = move
+            ones, twos = threat_scores(x, y)
+            if ones >= FORCING_SCORE or twos >= FORCING_SCORE:
+                own, other = (ones, twos) if player == 1 else (twos, ones)
+                scores[move] = 2 * own + other
+                forcing.append(move)
+            else:
+                scores[move] = root_scores[move] if root_scores is not None else ones + twos + history[y * size + x]
+                if move not in killers:
+                    quiet.append(move)
+        # Stable sorts: moves of equal score stay in the order they were given
+        by_score = scores.__getitem__
+        forcing.sort(key=by_score, reverse=True)
+        quiet.sort(key=by_score, reverse=True)
+
+        if ply is None:
+            ordered = []
+        else:
+            while len(self.ply_moves) <= ply:
+                self.ply_moves.append([])
+            ordered = self.ply_moves[ply]
+            ordered.clear()
+        if pv_move is not None and pv_move in scores:
+            ordered.append(pv_move)
+        if hash_move is not None and hash_move in scores:
+            ordered.append(hash_move)
+        ordered += forcing
+        for move in killers:
+            if move in scores and move != pv_move and move != hash_move and move not in forcing:
+                ordered.append(move)
+        ordered += quiet
+        return ordered
+
+    def candidate_moves(self, ply):
+        """The board's candidate moves, in this ply's reused list."""
+        while len(self.ply_candidates) <= ply:
+            self.ply_candidates.append([])
+        return self.board.get_nearby_cells(self.ply_candidates[ply])
+
+    def score_root_moves(self, moves):
+        """Return {move: evaluate() after the AI plays it} for the root moves.
+
+        With NumPy the children are scored together by batch_evaluator.child_scores; without it each
+        is placed in the incremental evaluator and taken back. Both give the same scores.
+        """
+        from batch_evaluator import available, child_scores
+        sign = 1 if self.player == 2 else -1
+        if available():
+            return {move: sign * int(score) for move, score in zip(moves, child_scores(self.board, moves, self.player))}
+        scores = {}
         for x, y in moves:
-            priority = 0
-            if 5 <= x <= 9 and 5 <= y <= 9:  # Give priority to central moves
-                priority += 10
-            if self.board.last_move:
-                lx, ly = self.board.last_move
-                distance = abs(x - lx) + abs(y - ly)  # Priority based on distance from last move
-                priority += (10 - distance)
-            self.board.grid[y][x] = 2  # Evaluate the move by making it temporarily
-            score = self.evaluate()  # Get the evaluation score
-            self.board.grid[y][x] = 0  # Revert the move
-            priority += score // 100  # Add score-based weight
-            ordered.append((priority, (x, y)))
-        ordered.sort(reverse=True)  # Sort moves by priority
-        return [move for _, move in ordered]
+            self.evaluator.place(x, y, self.player)
+            scores[(x, y)] = self.evaluate()
+            self.evaluator.remove(x, y, self.player)
+        return scores
+
+    def record_cutoff(self, move, player, depth, ply):
+        """Reward a move that caused a beta cutoff: make it a killer at this ply and raise its history score."""
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[KILLER_SLOTS:]
+        x, y = move
+        self.history[player][y * self.board.size + x] += depth * depth
 
     def evaluate(self):
-        """Evaluate the current board state and return a score based on possible threats and opportunities."""
-        score = 0
-        for y in range(self.board.size):
-            for x in range(self.board.size):
-                player = self.board.grid[y][x]
-                if player == 0:
-                    continue
-                multiplier = 1 if player == 2 else -1
-                for dx, dy in [(1, 0), (0, 1), (1, 1), (1, -1)]:
-                    count = 0
-                    open_ends = 0
-                    for i in range(-4, 5):  # Check for lines of 5 pieces in different directions
-                        nx, ny = x + i * dx, y + i * dy
-                        if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                            if self.board.grid[ny][nx] == player:
-                                count += 1
-                            else:
-                                if self.board.grid[ny][nx] == 0:
-                                    open_ends += 1
-                                count = 0
-                        else:
-                            count = 0
-                        if count == 2:
-                            score += (50 if open_ends >= 1 else 10) * multiplier
-                        elif count == 3:
-                            score += (500 if open_ends >= 1 else 100) * multiplier
-                        elif count == 4:
-                            score += (5000 if open_ends >= 1 else 1000) * multiplier
-                        elif count >= 5:
-                            score += 100000 * multiplier
-                    if 5 <= x <= 9 and 5 <= y <= 9 and self.board.grid[y][x] == player:
-                        score += 5 * multiplier  # Add score for central positions
-        return score
+        """Evaluate the current board state and return a score based on possible threats and opportunities.
+
+        The score is kept up to date by the incremental PatternEvaluator as trial stones are placed and
+        removed, so this is O(1); evaluator.reference_evaluate is the equivalent full-board rescan.
+        The evaluator scores for player 2, so the sign flips when the AI plays player 1.
+        """
+        return self.evaluator.score if self.player == 2 else -self.evaluator.score
+
+    def place(self, x, y, player):
+        """Place a trial stone on the board and in the incremental evaluator."""
+        self.board.place(x, y, player)
+        self.evaluator.place(x, y, player)
+        self.line.append((x, y))
 
-    def minimax(self, depth, alpha, beta, maximizing):
+    def undo(self, x, y, player):
+        """Take back a trial stone placed with place()."""
+        self.line.pop()
+        self.board.undo(x, y)
+        self.evaluator.remove(x, y, player)
+
+    def minimax(self, depth, alpha, beta, maximizing, ply=1):
         """Minimax algorithm to evaluate the best possible move by recursively exploring the game tree."""
-        for y in range(self.board.size):
-            for x in range(self.board.size):
-                if self.board.grid[y][x] != 0 and self.board.check_win(x, y, self.board.grid[y][x]):
-                    return 100000 if self.board.grid[y][x] == 2 else -100000
+        self.nodes += 1
+        if self.should_stop and self.nodes % CANCEL_CHECK_INTERVAL == 0 and self.should_stop():
+            raise SearchCancelled()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+        self.pv_lines[ply] = []
+
+        # The board tracks wins as stones are placed, so terminal detection is a lookup
+        if self.board.winner:
+            return WIN_SCORE if self.board.winner == self.player else -WIN_SCORE
+
+        # Reuse earlier analysis of this position; bounds only cut off when deep enough
+        side = self.player if maximizing else self.opponent
+        key = self.board.hash ^ (SIDE_TO_MOVE_KEY if side == 2 else 0)
+        entry = self.table.probe(key)
+        hash_move = None
+        if entry is not None:
+            _, entry_depth, entry_score, flag, hash_move, _ = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return entry_score
+                if flag == LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if beta <= alpha:
+                    return entry_score
+        alpha_orig, beta_orig = alpha, beta
 
         if depth == 0:  # Base case: evaluate at maximum depth
-            return self.evaluate()
+            self.leaves += 1
+            score = self.evaluate()
+            self.table.store(key, 0, score, EXACT, None)
+            return score
 
-        empty_cells = self.order_moves(self.board.get_nearby_cells())
+        empty_cells = self.order_moves(self.candidate_moves(ply), ply, hash_move, side)
+        best_move = None
         if maximizing:  # Maximize the score for AI's turn
-            max_eval = -float('inf')
-            for x, y in empty_cells:
-                self.board.grid[y][x] = 2
-                eval_score = self.minimax(depth - 1, alpha, beta, False)
-                self.board.grid[y][x] = 0
-                max_eval = max(max_eval, eval_score)
+            best_eval = -float('inf')
+            for i, (x, y) in enumerate(empty_cells):
+                self.place(x, y, self.player)
+                try:
+                    eval_score = self.minimax(depth - 1, alpha, beta, False, ply + 1)
+                finally:
+                    self.undo(x, y, self.player)
+                if eval_score > best_eval:
+                    best_eval = eval_score
+                    best_move = (x, y)
+                    self.pv_lines[ply] = [(x, y)] + self.pv_lines[ply + 1]
                 alpha = max(alpha, eval_score)
                 if beta <= alpha:  # Beta pruning
+                    self.cutoffs += 1
+                    self.first_move_cutoffs += i == 0
+                    self.record_cutoff((x, y), side, depth, ply)
                     break
-            return max_eval
         else:  # Minimize the score for the opponent's turn
-            min_eval = float('inf')
-            for x, y in empty_cells:
-                self.board.grid[y][x] = 1
-                eval_score = self.minimax(depth - 1, alpha, beta, True)
-                self.board.grid[y][x] = 0
-                min_eval = min(min_eval, eval_score)
+            best_eval = float('inf')
+            for i, (x, y) in enumerate(empty_cells):
+                self.place(x, y, self.opponent)
+                try:
+                    eval_score = self.minimax(depth - 1, alpha, beta, True, ply + 1)
+                finally:
+                    self.undo(x, y, self.opponent)
+                if eval_score < best_eval:
+                    best_eval = eval_score
+                    best_move = (x, y)
+                    self.pv_lines[ply] = [(x, y)] + self.pv_lines[ply + 1]
                 beta = min(beta, eval_score)
                 if beta <= alpha:  # Beta pruning
+                    self.cutoffs += 1
+                    self.first_move_cutoffs += i == 0
+                    self.record_cutoff((x, y), side, depth, ply)
                     break
-            return min_eval
 
-    async def get_best_move(self):
-        """Get the best move for the AI by analyzing the board using Minimax."""
-        total_moves = sum(self.board.grid[y][x] != 0 for y in range(self.board.size) for x in range(self.board.size))
-        if total_moves < 2:  # Handle first two moves separately (center strategy)
-            center = self.board.size // 2
-            if self.board.grid[center][center] == 0:
-                return (center, center)
-            elif self.board.grid[center][center - 1] == 0:
-                return (center, center - 1)
+        if best_eval <= alpha_orig:
+            flag = UPPER
+        elif best_eval >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(key, depth, best_eval, flag, best_move)
+        return best_eval
+
+    def negamax(self, depth, alpha, beta, side, ply=1):
+        """Principal variation search in negamax form: the score of the position for side, the side to move.
+
+        The first (expected best) move gets the full (alpha, beta) window; every other move is first
+        searched with a null window that only proves it is no better than alpha, and is searched
+        again with the full window if that proof fails. Table entries are stored from the AI's point
+        of view like minimax() stores them, so both algorithms read and write the same format.
+        """
+        self.nodes += 1
+        if self.should_stop and self.nodes % CANCEL_CHECK_INTERVAL == 0 and self.should_stop():
+            raise SearchCancelled()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+        self.pv_lines[ply] = []
+
+        if self.board.winner:
+            return WIN_SCORE if self.board.winner == side else -WIN_SCORE
 
+        sign = 1 if side == self.player else -1  # Converts between side's and the AI's point of view
+        key = self.board.hash ^ (SIDE_TO_MOVE_KEY if side == 2 else 0)
+        entry = self.table.probe(key)
+        hash_move = None
+        if entry is not None:
+            _, entry_depth, entry_score, flag, hash_move, _ = entry
+            if entry_depth >= depth:
+                entry_score *= sign
+                if flag != EXACT and sign < 0:
+                    flag = UPPER if flag == LOWER else LOWER  # A bound for the AI is the opposite bound for side
+                if flag == EXACT:
+                    return entry_score
+                if flag == LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if beta <= alpha:
+                    return entry_score
+        alpha_orig = alpha
+
+        if depth == 0:
+            self.leaves += 1
+            score = self.evaluate() * sign
+            self.table.store(key, 0, score * sign, EXACT, None)
+            return score
+
+        moves = self.order_moves(self.candidate_moves(ply), ply, hash_move, side)
         best_score = -float('inf')
         best_move = None
-        alpha = -float('inf')
-        beta = float('inf')
-
-        # Check for immediate winning move or blocking move
-        for y in range(self.board.size):
-            for x in range(self.board.size):
-                if self.board.grid[y][x] == 0:
-                    self.board.grid[y][x] = 2
-                    if self.board.check_win(x, y, 2):  # Check if AI can win
-                        self.board.grid[y][x] = 0
-                        return (x, y)
-                    self.board.grid[y][x] = 0
-
-        for y in range(self.board.size):
-            for x in range(self.board.size):
-                if self.board.grid[y][x] == 0:
-                    self.board.grid[y][x] = 1
-                    if self.board.check_win(x, y, 1):  # Check if opponent can win
-                        self.board.grid[y][x] = 0
-                        return (x, y)
-                    self.board.grid[y][x] = 0
+        for i, (x, y) in enumerate(moves):
+            self.place(x, y, side)
+            try:
+                score = self.search_child(depth, alpha, beta, side, ply, i == 0)
+            finally:
+                self.undo(x, y, side)
+            if score > best_score:
+                best_score = score
+                best_move = (x, y)
+                self.pv_lines[ply] = [(x, y)] + self.pv_lines[ply + 1]
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                self.cutoffs += 1
+                self.first_move_cutoffs += i == 0
+                self.record_cutoff((x, y), side, depth, ply)
+                break
+
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if sign < 0 and flag != EXACT:
+            flag = UPPER if flag == LOWER else LOWER
+        self.table.store(key, depth, best_score * sign, flag, best_move)
+        return best_score
+
+    def search_child(self, depth, alpha, beta, side, ply, first):
+        """PVS step: score, for side, of the move side has just placed, searched to depth - 1 below ply."""
+        if first:
+            return -self.negamax(depth - 1, -beta, -alpha, 3 - side, ply + 1)
+        score = -self.negamax(depth - 1, -alpha - 1, -alpha, 3 - side, ply + 1)
+        if alpha < score < beta:  # Better than the first move after all: get its exact score
+            score = -self.negamax(depth - 1, -beta, -alpha, 3 - side, ply + 1)
+        return score
 
-        empty_cells = self.order_moves(self.board.get_nearby_cells())
-        for x, y in empty_cells:
-            self.board.grid[y][x] = 2
-            score = self.minimax(self.depth - 1, alpha, beta, False)
-            self.board.grid[y][x] = 0
+    def search_root(self, depth, alpha=-float('inf'), beta=float('inf')):
+        """Search every candidate move to the given depth and return (best_move, best_score).
+
+        With a narrower (alpha, beta) window (PVS aspiration) a best_score <= alpha or >= beta is only
+        a bound and the caller must search again with a wider window.
+        """
+        best_score = -float('inf')
+        best_move = None
+        alpha_orig = alpha
+        self.pv_lines[0] = []
+
+        key = self.board.hash ^ (SIDE_TO_MOVE_KEY if self.player == 2 else 0)
+        entry = self.table.probe(key)
+        hash_move = entry[4] if entry is not None else None
+        empty_cells = self.order_moves(self.candidate_moves(0), 0, hash_move)
+        for i, (x, y) in enumerate(empty_cells):
+            self.place(x, y, self.player)
+            try:
+                if self.algorithm == "pvs":
+                    score = self.search_child(depth, alpha, beta, self.player, 0, i == 0)
+                else:
+                    score = self.minimax(depth - 1, alpha, beta, False)
+            finally:
+                self.undo(x, y, self.player)
             if score > best_score:
                 best_score = score
                 best_move = (x, y)
+                self.pv_lines[0] = [best_move] + self.pv_lines.get(1, [])
             alpha = max(alpha, score)  # Alpha pruning
+            if alpha >= beta:
+                break  # Fail high: the aspiration window was too low
+        if best_score <= alpha_orig:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(key, depth, best_score, flag, best_move)
+        return best_move, best_score
+
+    def aspiration_search(self, depth, guess):
+        """Root search in a narrow window around guess (an earlier iteration's score), widened on failure.
+
+        Each fail low or fail high quadruples the half-width; past the win score the window is
+        unbounded on the failing side, so the loop always ends with an exact score.
+        """
+        delta = ASPIRATION_WINDOW
+        alpha, beta = guess - delta, guess + delta
+        while True:
+            move, score = self.search_root(depth, alpha, beta)
+            if alpha < score < beta:
+                return move, score
+            delta *= 4
+            if score <= alpha:
+                alpha = score - delta if delta < WIN_SCORE else -float('inf')
+            else:
+                beta = score + delta if delta < WIN_SCORE else float('inf')
+
+    def iterative_deepening(self):
+        """Search depth 1, 2, 3... until the time budget runs out and return the deepest completed result.
+
+        Depth 1 always completes so a real move is returned even under a tiny budget; each iteration's
+        principal variation orders the moves of the next one. With PVS the root window is centered on
+        the score from two iterations back: scores swing by thousands between odd and even depths
+        (whoever moves last at the horizon looks better), but much less between depths of equal parity.
+        """
+        start = self.search_start if self.search_start is not None else time.perf_counter()
+        best_move = None
+        self.pv = []
+        self.completed_depth = 0
+        self.deadline = None  # The first iteration always runs to completion
+        scores = {}  # Root score of each completed iteration
+        for depth in range(1, MAX_ITERATIVE_DEPTH + 1):
+            try:
+                if self.algorithm == "pvs" and depth - 2 in scores:
+                    move, score = self.aspiration_search(depth, scores[depth - 2])
+                else:
+                    move, score = self.search_root(depth)
+            except SearchTimeout:
+                break
+            scores[depth] = score
+            best_move = move
+            self.completed_depth = depth
+            self.pv = self.pv_lines[0]
+            self.deadline = start + self.time_limit
+            if abs(score) >= WIN_SCORE or time.perf_counter() >= self.deadline:
+                break  # Result is decided, or there is no time for another iteration
+        self.deadline = None
+        return best_move
+
+    def threat_move(self):
+        """Return a move decided by threat-space search, or None to leave the move to the main search.
+
+        Wins now, blocks the opponent's five, starts a forced win (VCF/VCT) if one exists, and otherwise
+        looks for a stone that stops the opponent's forced win.
+        """
+        from threat_search import THREAT_TIME_LIMIT, THREAT_TIME_SHARE, ThreatSearch
+        time_limit = THREAT_TIME_LIMIT
+        if self.time_limit is not None:  # Leave most of a timed move's budget to the main search
+            remaining = self.search_start + self.time_limit - time.perf_counter()
+            time_limit = min(time_limit, max(0.0, remaining) * THREAT_TIME_SHARE)
+        threats = ThreatSearch(self.board, time_limit=time_limit, should_stop=self.should_stop)
+        try:
+            for player in (self.player, self.opponent):  # Complete our five, else block theirs
+                points = threats.five_points(player)
+                if points:
+                    return points[0]
+            line = threats.find_win(self.player)
+            if line:
+                return line[0]
+            line = threats.find_win(self.opponent)
+            if line:
+                # Try the opponent's attacking cells until one leaves them without a forced win
+                for x, y in line[::2]:
+                    threats.place(x, y, self.player)
+                    refuted = threats.find_win(self.opponent) is None and not threats.exhausted
+                    threats.undo(x, y, self.player)
+                    if refuted:
+                        return (x, y)
+            return None
+        finally:
+            self.threat_nodes = threats.nodes
+
+    def get_best_move(self):
+        """Get the best move for the AI by analyzing the board using Minimax.
+
+        This runs synchronously; the game hands it to a worker process (see search_executor.py)
+        so the UI event loop is never blocked by the search.
+        """
+        if not self.collect_stats:
+            return self.choose_move()
+        from search_stats import SearchStats
+        stats = SearchStats()
+        stats.attach(self)
+        try:
+            return self.choose_move()
+        finally:
+            stats.detach()
+            self.last_stats = stats.as_dict(self)
+
+    def choose_move(self):
+        """Run one search and return its move; get_best_move() wraps this with optional profiling."""
+        self.search_start = time.perf_counter()
+        self.nodes = self.leaves = self.cutoffs = self.first_move_cutoffs = 0
+        self.threat_nodes = 0
+        self.completed_depth = 0  # Stays 0 when the book, the center rule or the threat search picks the move
+        self.table.new_search()
+        self.killers = []  # Plies are counted from the new root, so old killers no longer apply
+        self.root_scores = {}
+        for scores in self.history[1:]:  # Age the history so recent searches dominate
+            scores[:] = [score // 2 for score in scores]
+        self.evaluator.load(self.board)  # The board may have changed since the last search
+        self.book_move = False
+        if self.book is not None:
+            from opening_book import load_book
+            book = load_book(self.book)
+            move = book.lookup(self.board, self.player) if book is not None else None
+            if move is not None:
+                self.book_move = True
+                return move
+        cells = self.board.snapshot()[1]
+        total_moves = len(cells) - cells.count(0)
+        if total_moves < 2:  # Handle first two moves separately (center strategy)
+            center = self.board.size // 2
+            if cells[center * self.board.size + center] == 0:
+                return (center, center)
+            elif cells[center * self.board.size + center - 1] == 0:
+                return (center, center - 1)
+
+        # Tactics first: immediate wins and blocks, then forced threat sequences for both sides
+        if self.use_threat_search:
+            move = self.threat_move()
+            if move is not None:
+                return move
+
+        if self.time_limit is not None:
+            return self.iterative_deepening()
+        self.pv = []
+        best_move, _ = self.search_root(self.depth)
+        self.completed_depth = self.depth
         return best_move
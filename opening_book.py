@@ -0,0 +1,210 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from gomoku_board import AIPlayer, GRID_SIZE, SIDE_TO_MOVE_KEY, WIN_LENGTH, GomokuBoard, zobrist_keys
+
+BOOK_MAGIC = b"GMKB"
+BOOK_VERSION = 1
+HEADER = struct.Struct("<4sHHI")  # Magic, version, board size, slot count (a power of two)
+ENTRY = struct.Struct("<QHH")  # Canonical key (0 = empty slot), move cell in the canonical frame, search depth
+DEFAULT_BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+
+_symmetry_cache = {}
+_open_books = {}
+
+
+def symmetries(size):
+    """The 8 symmetries of the square board as (forward, inverse) cell maps over indexes y * size + x."""
+    if size not in _symmetry_cache:
+        last = size - 1
+        transforms = [
+            lambda x, y: (x, y), lambda x, y: (last - x, y), lambda x, y: (x, last - y),
+            lambda x, y: (last - x, last - y), lambda x, y: (y, x), lambda x, y: (last - y, x),
+            lambda x, y: (y, last - x), lambda x, y: (last - y, last - x),
+        ]
+        maps = []
+        for transform in transforms:
+            forward = [0] * (size * size)
+            inverse = [0] * (size * size)
+            for y in range(size):
+                for x in range(size):
+                    tx, ty = transform(x, y)
+                    forward[y * size + x] = ty * size + tx
+                    inverse[ty * size + tx] = y * size + x
+            maps.append((forward, inverse))
+        _symmetry_cache[size] = maps
+    return _symmetry_cache[size]
+
+
+def canonical_key(cells, size, player):
+    """Return (key, symmetry index) for a position given as one byte per cell, with player to move.
+
+    The key is the smallest Zobrist hash over the 8 symmetric images of the position, so all of them
+    share one book entry; the symmetry index says which image that was, for mapping moves back.
+    """
+    zobrist = zobrist_keys(size)
+    side = SIDE_TO_MOVE_KEY if player == 2 else 0
+    stones = [(index, cell) for index, cell in enumerate(cells) if cell]
+    best = None
+    for symmetry, (forward, _) in enumerate(symmetries(size)):
+        key = side
+        for index, cell in stones:
+            key ^= zobrist[cell][forward[index]]
+        key = key or 1  # 0 marks an empty slot
+        if best is None or key < best[0]:
+            best = (key, symmetry)
+    return best
+
+
+class OpeningBook:
+    def __init__(self, path):
+        """Read-only opening book backed by a memory-mapped file written by write_book().
+
+        The file is an open-addressing hash table of fixed-size entries, so a lookup hashes the
+        position (8 symmetric Zobrist hashes), then reads a slot or two straight from the mapping,
+        without loading or parsing the file.
+        """
+        self.path = path
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.slots = HEADER.unpack_from(self.data, 0)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            raise ValueError(f"{path} is not a version {BOOK_VERSION} opening book")
+        self.mask = self.slots - 1
+
+    def __len__(self):
+        """Number of positions in the book (scans every slot)."""
+        return sum(1 for slot in range(self.slots) if ENTRY.unpack_from(self.data, HEADER.size + slot * ENTRY.size)[0])
+
+    def lookup(self, board, player):
+        """Return the book move (x, y) for player to move on board, or None if the position is not in the book.
+
+        Books are generated for five in a row, so boards with another win length are never in one.
+        """
+        if board.size != self.size or board.win_length != WIN_LENGTH:
+            return None
+        cells = board.snapshot()[1]
+        key, symmetry = canonical_key(cells, self.size, player)
+        slot = key & self.mask
+        while True:
+            stored, cell, _ = ENTRY.unpack_from(self.data, HEADER.size + slot * ENTRY.size)
+            if stored == 0:
+                return None
+            if stored == key:
+                index = symmetries(self.size)[symmetry][1][cell]  # Back from the canonical frame
+                if cells[index]:
+                    return None  # Hash collision with a different position
+                return index % self.size, index // self.size
+            slot = (slot + 1) & self.mask
+
+    def close(self):
+        """Unmap and close the book file."""
+        self.data.close()
+        self.file.close()
+
+
+def load_book(path=DEFAULT_BOOK_FILE):
+    """Return the OpeningBook for path, opened once per process, or None if there is no such file."""
+    if path not in _open_books:
+        _open_books[path] = OpeningBook(path) if os.path.exists(path) else None
+    return _open_books[path]
+
+
+def write_book(entries, path, size=GRID_SIZE):
+    """Write {canonical key: (canonical move cell, depth)} as a book file with at most half the slots used."""
+    slots = 1
+    while slots < 2 * len(entries):
+        slots *= 2
+    table = [None] * slots
+    for key, (cell, depth) in entries.items():
+        slot = key & (slots - 1)
+        while table[slot] is not None:
+            slot = (slot + 1) & (slots - 1)
+        table[slot] = (key, cell, depth)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(BOOK_MAGIC, BOOK_VERSION, size, slots))
+        for entry in table:
+            f.write(ENTRY.pack(*entry) if entry is not None else ENTRY.pack(0, 0, 0))
+
+
+def _book_position(moves, depth, time_limit, width):
+    """Worker: search a position (moves alternate from player 1).
+
+    Returns (key, canonical move cell, depth searched, children), where children are up to width + 1
+    (move, child key) pairs: the searched move first, then the best alternatives by move ordering,
+    skipping moves that lead to a position symmetric to an earlier child.
+    """
+    board = GomokuBoard(GRID_SIZE)
+    for i, (x, y) in enumerate(moves):
+        board.make_move(x, y, 1 if i % 2 == 0 else 2)
+    player = 1 if len(moves) % 2 == 0 else 2
+    key, symmetry = canonical_key(board.snapshot()[1], board.size, player)
+    ai = AIPlayer(board, depth=depth, time_limit=time_limit, player=player)
+    move = ai.get_best_move()
+    searched = ai.completed_depth  # 0 when the center rule or the threat search chose the move
+    ai.evaluator.load(board)
+    children = []
+    keys = set()
+    for x, y in [move] + ai.order_moves(board.get_nearby_cells(), None, None, player):
+        if len(children) > width:
+            break
+        if not board.is_valid_move(x, y):
+            continue
+        board.place(x, y, player)
+        child_key = canonical_key(board.snapshot()[1], board.size, 3 - player)[0]
+        board.undo(x, y)
+        if child_key not in keys:
+            keys.add(child_key)
+            children.append(((x, y), child_key))
+    forward = symmetries(board.size)[symmetry][0]
+    return key, forward[move[1] * board.size + move[0]], searched, children
+
+
+def generate(plies, depth, time_limit, width, workers):
+    """Build the book breadth first from the empty board; return {canonical key: (cell, depth)}.
+
+    Every position gets the move of a deep search. Its children are that move and the width next
+    best moves by move ordering, so the book also covers the likely deviations by either side.
+    Positions that are symmetric to one already searched are skipped.
+    """
+    entries = {}
+    frontier = [[]]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for ply in range(plies):
+            start = time.perf_counter()
+            results = pool.map(_book_position, frontier, [depth] * len(frontier), [time_limit] * len(frontier),
+                               [width] * len(frontier))
+            next_frontier = []
+            seen = set()
+            for moves, (key, cell, searched, children) in zip(frontier, results):
+                entries[key] = (cell, searched)
+                for child, child_key in children:
+                    if child_key not in entries and child_key not in seen:
+                        seen.add(child_key)
+                        next_frontier.append(moves + [child])
+            print(f"ply {ply}: {len(frontier)} positions in {time.perf_counter() - start:.1f}s")
+            frontier = next_frontier
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate an opening book with deep searches.")
+    parser.add_argument("--plies", type=int, default=4, help="book depth in moves from the empty board")
+    parser.add_argument("--depth", type=int, default=4, help="search depth per book position")
+    parser.add_argument("--time", type=float, default=None, help="seconds per position (iterative deepening)")
+    parser.add_argument("--width", type=int, default=3, help="alternative moves expanded per position")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--output", default=DEFAULT_BOOK_FILE, help="book file to write")
+    args = parser.parse_args()
+
+    entries = generate(args.plies, args.depth, args.time, args.width, args.workers)
+    write_book(entries, args.output)
+    print(f"{len(entries)} positions written to {args.output} ({os.path.getsize(args.output)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from gomoku_board import (AIPlayer, MAX_DEPTH, MAX_ITERATIVE_DEPTH, SearchCancelled, SearchTimeout, WIN_SCORE,
+                          board_class)
+from search_executor import WorkerPool, search_cancelled
+
+# Shared alpha state installed in each worker process by _init_worker
+_shared = None
+# (move id, AIPlayer) kept by the worker so every root move and iteration of one move's search reuses
+# one board, evaluator and transposition table
+_worker_ai = (None, None)
+
+
+def _init_worker(shared):
+    """Store the shared search state (see ParallelSearch.__init__) in the worker process."""
+    global _shared
+    _shared = shared
+
+
+def _worker_player(move_id, snapshot, backend, ai_options):
+    """Return the worker's AIPlayer for a move, building it from the snapshot on the move's first task."""
+    global _worker_ai
+    if _worker_ai[0] != move_id:
+        board = board_class(backend).from_snapshot(snapshot)
+        ai = AIPlayer(board, threat_search=False, **ai_options)
+        ai.table.new_search()
+        ai.evaluator.load(board)
+        _worker_ai = (move_id, ai)
+    return _worker_ai[1]
+
+
+def _search_root_move(move_id, search_id, snapshot, backend, ai_options, move, depth, first, pv, time_left):
+    """Worker entry point: search one root move to depth and return (move, score, alpha used, nodes).
+
+    alpha is read from shared memory when the move starts, so the move is searched against the best
+    score any worker has proven so far, and raised there when this move beats it. A score above the
+    alpha used is exact; one at or below it only says the move is no better. Returns None if the
+    search was cancelled or ran out of time.
+    """
+    ai = _worker_player(move_id, snapshot, backend, ai_options)
+    ai.should_stop = lambda: search_cancelled(search_id)
+    alpha_value = _shared["alpha"]
+    with alpha_value.get_lock():
+        alpha = alpha_value.value if _shared["search_id"].value == search_id else -float('inf')
+    ai.nodes = 0
+    ai.pv = pv
+    ai.deadline = time.perf_counter() + time_left if time_left is not None else None
+    x, y = move
+    ai.place(x, y, ai.player)
+    try:
+        if ai.algorithm == "pvs":
+            score = ai.search_child(depth, alpha, float('inf'), ai.player, 0, first)
+        else:
+            score = ai.minimax(depth - 1, alpha, float('inf'), False)
+    except (SearchCancelled, SearchTimeout):
+        return None
+    finally:
+        ai.undo(x, y, ai.player)
+    with alpha_value.get_lock():
+        if _shared["search_id"].value == search_id and score > alpha_value.value:
+            alpha_value.value = score
+    return move, score, alpha, ai.nodes
+
+
+class ParallelSearch(WorkerPool):
+    def __init__(self, workers=2, backend="list"):
+        """Root-splitting parallel search over a pool of worker processes.
+
+        Each root move is a separate task. The first move (the previous iteration's best) is searched
+        alone to get a good alpha, then the remaining moves are spread over the workers, which share
+        the best score found so far through a shared-memory double. Every worker keeps its own board,
+        evaluator and transposition table for the whole search. With the same ordering and alpha
+        bounds this returns the same scores as AIPlayer.search_root; the chosen move can differ only
+        between moves of equal score. The pool and the cancellation of searches by id come from
+        WorkerPool; here a search is one root search (one iteration), spread over many tasks.
+        """
+        self.shared = {
+            "alpha": multiprocessing.Value('d', -float('inf')),  # Best root score proven so far
+            "search_id": multiprocessing.RawValue('q', 0),  # Search the alpha belongs to
+        }
+        super().__init__(workers, _init_worker, (self.shared,))
+        self.backend = backend
+        self.move_id = 0  # One per search() call; workers rebuild their board when it changes
+        self.nodes = 0  # Nodes searched by all workers for the last move
+        self.threat_nodes = 0  # Nodes of the threat search run before them, in this process
+        self.completed_depth = 0
+
+    def _search_depth(self, snapshot, moves, depth, pv, ai_options, deadline):
+        """Search every root move to depth; return (best_move, best_score, nodes) or None on timeout."""
+        search_id = self.start_search()
+        try:
+            return self._search_moves(search_id, snapshot, moves, depth, pv, ai_options, deadline)
+        finally:
+            self.finish_search(search_id)
+
+    def _search_moves(self, search_id, snapshot, moves, depth, pv, ai_options, deadline):
+        """_search_depth() for the root search with the given id."""
+        with self.shared["alpha"].get_lock():
+            self.shared["search_id"].value = search_id
+            self.shared["alpha"].value = -float('inf')
+        pool = self._get_pool()
+
+        def submit(index):
+            time_left = deadline - time.perf_counter() if deadline is not None else None
+            return pool.submit(_search_root_move, self.move_id, search_id, snapshot, self.backend, ai_options,
+                               moves[index], depth, index == 0, pv, time_left)
+
+        results = []
+        pending = {submit(0): 0}  # The first move alone, so the others start with its score as alpha
+        started = 1
+        while pending:
+            timeout = max(0.0, deadline - time.perf_counter()) if deadline is not None else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            result = None
+            for future in done:
+                index = pending.pop(future)
+                result = future.result()
+                if result is None:
+                    break
+                results.append((index, result))
+            if not done or result is None:
+                self.cancel(search_id)
+                for future in pending:
+                    future.cancel()
+                return None
+            while started < len(moves) and len(pending) < self.max_workers:
+                pending[submit(started)] = started
+                started += 1
+
+        # Exact scores only: a move that failed low against another move's alpha cannot be the best
+        best = None
+        nodes = 0
+        for index, (move, score, alpha, move_nodes) in results:
+            nodes += move_nodes
+            if score > alpha and (best is None or (score, -index) > (best[1], -best[0])):
+                best = (index, score, move)
+        return best[2], best[1], nodes
+
+    def search(self, board, player=2, depth=MAX_DEPTH, time_limit=None, algorithm="minimax", threat_search=True,
+               book=None):
+        """Return the best move for player, searched in parallel.
+
+        Like AIPlayer.get_best_move: the opening book (if book is given) and threat-space search first
+        (in this process, unless threat_search is False), then a fixed-depth search, or iterative
+        deepening up to MAX_ITERATIVE_DEPTH when time_limit is given.
+        """
+        start = time.perf_counter()
+        self.move_id += 1
+        ai = AIPlayer(board, depth=depth, time_limit=time_limit, player=player, algorithm=algorithm)
+        ai.search_start = start
+        ai.evaluator.load(board)
+        self.nodes = 0
+        self.threat_nodes = 0
+        self.completed_depth = 0
+        if book is not None:
+            from opening_book import load_book
+            opening_book = load_book(book)
+            move = opening_book.lookup(board, player) if opening_book is not None else None
+            if move is not None:
+                return move
+        if sum(cell != 0 for row in board.grid for cell in row) < 2:
+            return ai.get_best_move()  # Center opening
+        move = ai.threat_move() if threat_search else None
+        self.threat_nodes = ai.threat_nodes
+        if move is not None:
+            return move
+
+        snapshot = board.snapshot()
+        moves = ai.order_moves(board.get_nearby_cells(), 0)
+        ai_options = {"player": player, "algorithm": algorithm}
+        depths = range(1, MAX_ITERATIVE_DEPTH + 1) if time_limit is not None else [depth]
+        best_move = moves[0]
+        deadline = None  # As in AIPlayer.iterative_deepening, the first iteration always completes
+        for search_depth in depths:
+            result = self._search_depth(snapshot, moves, search_depth, [best_move], ai_options, deadline)
+            if result is None:
+                break
+            best_move, score, nodes = result
+            self.nodes += nodes
+            self.completed_depth = search_depth
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+            if time_limit is None:
+                break
+            deadline = start + time_limit
+            if abs(score) >= WIN_SCORE or time.perf_counter() >= deadline:
+                break
+        return best_move
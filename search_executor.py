@@ -0,0 +1,167 @@
+import asyncio
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from gomoku_board import AIPlayer, SearchCancelled, board_class
+from transposition import TranspositionTable
+
+ID_SLOTS = 4096  # Shared flag slots for search and game ids; id n uses slot n % ID_SLOTS
+GAME_TABLES = 8  # Transposition tables a worker keeps, one per game, least recently used dropped first
+
+# Shared id slots installed in each worker process: cancelled[n % ID_SLOTS] == n once search n has
+# been abandoned (by _init_worker), ended[n % ID_SLOTS] == n once game n is over (by _init_games)
+_cancelled = None
+_ended = None
+# game_id -> TranspositionTable kept by the worker so later moves of a game reuse earlier analysis
+_game_tables = OrderedDict()
+
+
+def _init_worker(cancelled, initializer, initargs):
+    """Store the shared cancellation slots in the worker process, then run the pool's own initializer."""
+    global _cancelled
+    _cancelled = cancelled
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _init_games(ended):
+    """SearchExecutor's worker initializer: store the shared game-over slots."""
+    global _ended
+    _ended = ended
+
+
+def _id_slots():
+    """A shared array of ID_SLOTS ids, all -1 (no id marked)."""
+    slots = multiprocessing.RawArray('q', ID_SLOTS)
+    slots[:] = [-1] * ID_SLOTS
+    return slots
+
+
+def search_cancelled(search_id):
+    """In a WorkerPool worker: True once the search with this id has been abandoned."""
+    return _cancelled[search_id % ID_SLOTS] == search_id
+
+
+def _table_for_game(game_id):
+    """Return the worker's transposition table for a game, starting a fresh one for a new game.
+
+    Tables of games that have ended are dropped, and beyond GAME_TABLES the least recently used one.
+    """
+    for ended in [game for game in _game_tables if _ended[game % ID_SLOTS] == game]:
+        del _game_tables[ended]
+    table = _game_tables.pop(game_id, None)
+    if table is None:
+        table = TranspositionTable()
+        if len(_game_tables) >= GAME_TABLES:
+            _game_tables.popitem(last=False)
+    _game_tables[game_id] = table
+    return table
+
+
+def _run_search(snapshot, backend, ai_options, search_id, game_id):
+    """Worker entry point: rebuild the board from its snapshot and search it.
+
+    backend selects the board class used by the search and ai_options are passed to the AIPlayer
+    constructor. Returns (move, info), where move is None if the search was cancelled before it finished.
+    """
+    board = board_class(backend).from_snapshot(snapshot)
+    ai = AIPlayer(board, table=_table_for_game(game_id), **ai_options)
+    ai.should_stop = lambda: search_cancelled(search_id)
+    try:
+        move = ai.get_best_move()
+    except SearchCancelled:
+        move = None
+    return move, {"nodes": ai.nodes, "depth": ai.completed_depth, "tt": ai.table.stats(), "stats": ai.last_stats}
+
+
+class WorkerPool:
+    def __init__(self, max_workers, initializer=None, initargs=()):
+        """Process pool, started on first use, whose searches can be abandoned one by one.
+
+        Each search has its own id (start_search()) and is abandoned by id, so cancelling one search
+        leaves the others running. Workers poll their search's slot in shared memory through
+        search_cancelled(); a slot is reused only ID_SLOTS searches later. initializer(*initargs)
+        runs in every worker for state of the subclass's own.
+        """
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.initargs = initargs
+        self.pool = None
+        self.search_id = 0
+        self.running = set()  # Ids of the searches started and not yet finished
+        self.cancelled = _id_slots()  # Abandoned searches, polled by the workers while searching
+
+    def _get_pool(self):
+        """Create the process pool on first use."""
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(self.cancelled, self.initializer, self.initargs),
+            )
+        return self.pool
+
+    def start_search(self):
+        """Return the id of a new search, counted as running until finish_search()."""
+        self.search_id += 1
+        self.running.add(self.search_id)
+        return self.search_id
+
+    def finish_search(self, search_id):
+        """Stop counting a search as running; cancel() without an id no longer reaches it."""
+        self.running.discard(search_id)
+
+    def cancel(self, search_id=None):
+        """Abandon the given search, or every search still running."""
+        for cancelled in [search_id] if search_id is not None else list(self.running):
+            self.cancelled[cancelled % ID_SLOTS] = cancelled
+
+    def shutdown(self):
+        """Abandon any running search and stop the worker processes."""
+        self.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+
+class SearchExecutor(WorkerPool):
+    def __init__(self, max_workers=1, backend="list"):
+        """Run AI searches in a process pool so they never block the pygame event loop."""
+        self.ended = _id_slots()  # Finished games, whose tables the workers drop
+        super().__init__(max_workers, _init_games, (self.ended,))
+        self.backend = backend  # Board backend the workers search with
+        self.game_id = 0  # Workers keep one transposition table per game id
+        self.last_info = None  # Node count, depth, table counters and profile (stats=True) of the last finished search
+
+    async def search(self, board, timeout, game_id=None, **ai_options):
+        """Search the board in a worker process and return the best move.
+
+        game_id selects the worker's transposition table (by default the executor's current game, see
+        new_game()); callers running several games at once pass their own id per game.
+        ai_options (depth, time_limit, stats, ...) configure the AIPlayer in the worker. Raises
+        asyncio.TimeoutError if no move arrives within timeout seconds. On timeout or task
+        cancellation the worker is told to abandon the search so the pool frees up.
+        """
+        search_id = self.start_search()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_pool(), _run_search, board.snapshot(), self.backend,
+                                      ai_options, search_id, self.game_id if game_id is None else game_id)
+        try:
+            move, self.last_info = await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self.cancel(search_id)
+            raise
+        finally:
+            self.finish_search(search_id)
+        return move
+
+    def new_game(self):
+        """Abandon running searches and make workers start a fresh transposition table."""
+        self.cancel()
+        self.end_game(self.game_id)
+        self.game_id += 1
+
+    def end_game(self, game_id):
+        """Tell the workers a game is over, so they drop its transposition table."""
+        self.ended[game_id % ID_SLOTS] = game_id
@@ -0,0 +1,153 @@
+import json
+import time
+
+_MISSING = object()  # Marks a method that had no instance-level override before attach()
+
+
+class SearchStats:
+    def __init__(self):
+        """Per-search profile of an AIPlayer, collected only when the player is created with stats=True.
+
+        attach() replaces a few methods of the player and its board with timing and counting wrappers
+        for the duration of one search, and detach() puts the originals back, so a player without
+        stats runs the plain methods with no instrumentation cost at all.
+
+        The timed parts overlap only with the total: time covers the whole search, so whatever it
+        has left over was spent in minimax itself and the board's place/undo.
+        """
+        self.nodes_per_ply = []  # minimax nodes visited at each ply below the root
+        self.leaves_per_ply = []  # Horizon evaluations at each ply
+        self.iterations = []  # One {"depth", "nodes", "time", "completed"} per root search
+        self.expanded = 0  # Nodes whose moves were generated and ordered (the root included)
+        self.candidates = 0  # Moves generated over all expanded nodes
+        self.times = {"evaluate": 0.0, "eval_update": 0.0, "order_moves": 0.0, "check_win": 0.0, "threat_search": 0.0}
+        self.calls = {name: 0 for name in self.times}
+        self.elapsed = 0.0
+        self._originals = []
+        self._start = None
+
+    def _timed(self, name, function):
+        """Wrap function so its calls are counted and timed under name."""
+        times, calls, clock = self.times, self.calls, time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                times[name] += clock() - start
+                calls[name] += 1
+        return wrapper
+
+    def _patch(self, owner, name, wrapper):
+        """Shadow owner.name with wrapper on the instance, remembering how to undo it.
+
+        Objects with __slots__ (the boards and the evaluator) have no instance dict to hold the
+        wrapper, so they are switched to a throwaway subclass that defines it instead.
+        """
+        if hasattr(owner, "__dict__"):
+            self._originals.append((owner, name, vars(owner).get(name, _MISSING)))
+            setattr(owner, name, wrapper)
+            return
+        cls = type(owner)
+        self._originals.append((owner, "__class__", cls))
+        owner.__class__ = type(cls.__name__, (cls,), {"__slots__": (), name: staticmethod(wrapper)})
+
+    def attach(self, ai):
+        """Instrument an AIPlayer (and its board and evaluator) for one search."""
+        self._start = time.perf_counter()
+        nodes_per_ply, leaves_per_ply = self.nodes_per_ply, self.leaves_per_ply
+        order_moves, search_root = ai.order_moves, ai.search_root
+
+        def counted(search):
+            """Count the nodes and leaves of a minimax() or negamax() node by ply."""
+            def counted_search(depth, alpha, beta, side, ply=1):
+                while len(nodes_per_ply) <= ply:
+                    nodes_per_ply.append(0)
+                    leaves_per_ply.append(0)
+                nodes_per_ply[ply] += 1
+                leaves = ai.leaves
+                try:
+                    return search(depth, alpha, beta, side, ply)
+                finally:
+                    if depth == 0 and ai.leaves != leaves:  # A horizon node has no children, so the delta is its own
+                        leaves_per_ply[ply] += 1
+            return counted_search
+
+        def counted_order_moves(moves, *args):
+            self.expanded += 1
+            self.candidates += len(moves)
+            return timed_order_moves(moves, *args)
+
+        def recorded_search_root(depth, *window):
+            nodes, start, completed = ai.nodes, time.perf_counter(), False
+            try:
+                result = search_root(depth, *window)
+                completed = True
+                return result
+            finally:
+                self.iterations.append({"depth": depth, "nodes": ai.nodes - nodes,
+                                        "time": round(time.perf_counter() - start, 4), "completed": completed})
+
+        timed_order_moves = self._timed("order_moves", order_moves)
+        self._patch(ai, "minimax", counted(ai.minimax))
+        self._patch(ai, "negamax", counted(ai.negamax))
+        self._patch(ai, "order_moves", counted_order_moves)
+        self._patch(ai, "search_root", recorded_search_root)
+        self._patch(ai, "threat_move", self._timed("threat_search", ai.threat_move))
+        self._patch(ai, "evaluate", self._timed("evaluate", ai.evaluate))
+        self._patch(ai.evaluator, "place", self._timed("eval_update", ai.evaluator.place))
+        self._patch(ai.evaluator, "remove", self._timed("eval_update", ai.evaluator.remove))
+        self._patch(ai.board, "check_win", self._timed("check_win", ai.board.check_win))
+
+    def detach(self):
+        """Remove the wrappers installed by attach()."""
+        for owner, name, previous in reversed(self._originals):
+            if previous is _MISSING:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, previous)
+        self._originals = []
+        if self._start is not None:
+            self.elapsed += time.perf_counter() - self._start
+            self._start = None
+
+    def as_dict(self, ai):
+        """Return the profile together with the player's own counters as a JSON-serializable dict."""
+        nodes = sum(self.nodes_per_ply)
+        return {
+            "nodes": ai.nodes,
+            "threat_nodes": ai.threat_nodes,
+            "depth": ai.completed_depth,
+            "nodes_per_ply": self.nodes_per_ply[1:],
+            "leaves_per_ply": self.leaves_per_ply[1:],
+            "leaves": ai.leaves,
+            "cutoffs": ai.cutoffs,
+            "cutoff_rate": round(ai.cutoffs / self.expanded, 3) if self.expanded else 0.0,
+            "first_move_cutoff_rate": round(ai.first_move_cutoffs / ai.cutoffs, 3) if ai.cutoffs else 0.0,
+            "branching": round(self.candidates / self.expanded, 2) if self.expanded else 0.0,
+            "effective_branching": round(nodes / self.expanded, 2) if self.expanded else 0.0,
+            "iterations": self.iterations,
+            "time": round(self.elapsed, 4),
+            "times": {name: round(seconds, 4) for name, seconds in self.times.items()},
+            "calls": dict(self.calls),
+        }
+
+
+def format_stats(stats):
+    """Short human-readable lines for a stats dict from SearchStats.as_dict(), for the on-screen overlay."""
+    times = stats["times"]
+    return [
+        f"depth {stats['depth']}  nodes {stats['nodes']}  threat {stats['threat_nodes']}  {stats['time']:.2f}s",
+        f"nodes/ply {stats['nodes_per_ply']}",
+        f"leaves/ply {stats['leaves_per_ply']}",
+        f"cutoffs {stats['cutoff_rate']:.0%}  first-move {stats['first_move_cutoff_rate']:.0%}",
+        f"branching {stats['branching']}  searched {stats['effective_branching']}",
+        f"eval {times['evaluate'] + times['eval_update']:.2f}s  order {times['order_moves']:.2f}s  "
+        f"win {times['check_win']:.2f}s  threats {times['threat_search']:.2f}s",
+    ]
+
+
+def log_line(stats, move):
+    """One structured (JSON) log line describing a finished search."""
+    return json.dumps({"event": "search", "move": list(move) if move else None, **stats}, separators=(",", ":"))
@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Only engine modules are imported here: this runner must work on machines without pygame or a display
+from game_record import MAX_SIZE, RecordWriter
+from gomoku_board import AIPlayer, ALGORITHMS, GRID_SIZE, MAX_DEPTH, WIN_LENGTH, board_class
+from parallel_search import ParallelSearch
+
+OPENING_RADIUS = 3  # Random opening stones are placed within this many cells of the center
+
+
+def random_opening(board, count, rng):
+    """Place count random stones near the center, alternating colors from player 1; return the moves."""
+    center = board.size // 2
+    moves = []
+    for i in range(count):
+        cells = [(x, y) for y in range(center - OPENING_RADIUS, center + OPENING_RADIUS + 1)
+                 for x in range(center - OPENING_RADIUS, center + OPENING_RADIUS + 1) if board.is_valid_move(x, y)]
+        x, y = rng.choice(cells)
+        board.make_move(x, y, 1 if i % 2 == 0 else 2)
+        moves.append((x, y))
+    return moves
+
+
+def play_game(game, settings):
+    """Play one AI-vs-AI game and return its record as a dict.
+
+    settings holds the per-color engine options ("black"/"white": AIPlayer keyword arguments), the board
+    backend, size and win length, the number of random opening moves, the move limit, the base seed and
+    the search workers per move (more than 1 searches every move with a ParallelSearch over that many
+    processes). The record lists every move; ms, nodes and depth cover only the engine moves that
+    follow the opening.
+    """
+    seed = settings["seed"] + game
+    rng = random.Random(seed)
+    board = board_class(settings["backend"])(settings["size"], settings["win_length"])
+    moves = random_opening(board, settings["opening_moves"], rng)
+    players = {
+        1: AIPlayer(board, player=1, **settings["black"]),
+        2: AIPlayer(board, player=2, **settings["white"]),
+    }
+    record = {"game": game, "seed": seed, "opening": len(moves), "winner": 0, "moves": [], "ms": [], "nodes": [],
+              "depth": []}
+    player = 1 if len(moves) % 2 == 0 else 2
+    parallel = ParallelSearch(settings["search_workers"], settings["backend"]) if settings["search_workers"] > 1 else None
+    try:
+        while not board.winner and len(moves) < settings["max_moves"]:
+            start = time.perf_counter()
+            if parallel is not None:
+                ai = parallel
+                move = parallel.search(board, player, **settings["black" if player == 1 else "white"])
+            else:
+                ai = players[player]
+                move = ai.get_best_move()
+            elapsed = time.perf_counter() - start
+            if move is None or not board.make_move(move[0], move[1], player):
+                break  # No legal move left
+            moves.append(move)
+            record["ms"].append(round(elapsed * 1000, 1))
+            record["nodes"].append(ai.nodes + ai.threat_nodes)
+            record["depth"].append(ai.completed_depth)
+            player = 3 - player
+    finally:
+        if parallel is not None:
+            parallel.shutdown()
+    record["winner"] = board.winner
+    record["moves"] = [list(move) for move in moves]
+    return record
+
+
+def engine_options(depth, time_limit, algorithm, book):
+    """AIPlayer keyword arguments for one color."""
+    return {"depth": depth, "time_limit": time_limit, "algorithm": algorithm, "book": book}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless AI-vs-AI Gomoku games and write them as JSONL.")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--search-workers", type=int, default=1,
+                        help="processes each move's search is split over (parallel root search; "
+                             "use with fewer --workers)")
+    parser.add_argument("--black-depth", type=int, default=MAX_DEPTH, help="fixed search depth for player 1")
+    parser.add_argument("--white-depth", type=int, default=MAX_DEPTH, help="fixed search depth for player 2")
+    parser.add_argument("--black-time", type=float, default=None,
+                        help="seconds per move for player 1 (iterative deepening; overrides --black-depth)")
+    parser.add_argument("--white-time", type=float, default=None,
+                        help="seconds per move for player 2 (iterative deepening; overrides --white-depth)")
+    parser.add_argument("--black-algorithm", default="minimax", choices=ALGORITHMS, help="search for player 1")
+    parser.add_argument("--white-algorithm", default="minimax", choices=ALGORITHMS, help="search for player 2")
+    parser.add_argument("--book", default=None, help="opening book file both engines use (default: none)")
+    parser.add_argument("--opening-moves", type=int, default=2, help="random stones placed near the center first")
+    parser.add_argument("--max-moves", type=int, default=None,
+                        help="moves before a game is a draw (default: every cell of the board)")
+    parser.add_argument("--backend", default="list", help="board backend: list or bitboard")
+    parser.add_argument("--size", type=int, default=GRID_SIZE, help="board size")
+    parser.add_argument("--win-length", type=int, default=WIN_LENGTH, help="stones in a row that win")
+    parser.add_argument("--seed", type=int, default=0, help="base seed; game i uses seed + i")
+    parser.add_argument("--output", default="selfplay.jsonl", help="JSONL file the game records are appended to")
+    parser.add_argument("--record", default=None,
+                        help="binary record file (see game_record.py) the games are also appended to")
+    args = parser.parse_args()
+    if args.record and args.size > MAX_SIZE:
+        parser.error(f"--record holds boards of up to {MAX_SIZE}x{MAX_SIZE}, not {args.size}x{args.size}")
+
+    settings = {
+        "black": engine_options(args.black_depth, args.black_time, args.black_algorithm, args.book),
+        "white": engine_options(args.white_depth, args.white_time, args.white_algorithm, args.book),
+        "backend": args.backend,
+        "size": args.size,
+        "win_length": args.win_length,
+        "opening_moves": args.opening_moves,
+        "max_moves": args.max_moves if args.max_moves is not None else args.size * args.size,
+        "seed": args.seed,
+        "search_workers": args.search_workers,
+    }
+    results = {0: 0, 1: 0, 2: 0}
+    engine_moves = total_ms = total_nodes = 0
+    start = time.perf_counter()
+    writer = RecordWriter(args.record, args.size, args.win_length) if args.record else None
+    with ProcessPoolExecutor(max_workers=args.workers) as pool, open(args.output, "a") as output:
+        futures = [pool.submit(play_game, game, settings) for game in range(args.games)]
+        for future in as_completed(futures):
+            record = future.result()
+            output.write(json.dumps(record, separators=(",", ":")) + "\n")
+            output.flush()  # Stream results so a long run can be followed and interrupted safely
+            if writer is not None:
+                writer.write(record["moves"], record["winner"])
+                writer.flush()
+            results[record["winner"]] += 1
+            engine_moves += len(record["ms"])
+            total_ms += sum(record["ms"])
+            total_nodes += sum(record["nodes"])
+    if writer is not None:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"{args.games} games in {elapsed:.1f}s: black {results[1]}, white {results[2]}, draws {results[0]}")
+    if engine_moves:
+        print(f"{total_ms / engine_moves:.1f} ms/move, {total_nodes / max(total_ms / 1000, 1e-9):,.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    main()
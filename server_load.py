@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from game_server import DEFAULT_PORT
+from gomoku_board import GRID_SIZE, GomokuBoard
+
+GAME_MOVES = 20  # Client moves per game before the load generator starts a new one
+
+
+async def request(reader, writer, message):
+    """Send one request and wait for its answer."""
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def client(host, port, unix, stop_at, rng, latencies, counts):
+    """Play games against the server until stop_at, timing every move request.
+
+    The client plays player 1 with random moves next to the stones on the board.
+    """
+    if unix is not None:
+        reader, writer = await asyncio.open_unix_connection(unix)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.monotonic() < stop_at:
+            session = (await request(reader, writer, {"op": "new", "ai_player": 2}))["session"]
+            board = GomokuBoard(GRID_SIZE)
+            for _ in range(GAME_MOVES):
+                x, y = rng.choice(board.get_nearby_cells())
+                board.make_move(x, y, 1)
+                start = time.perf_counter()
+                response = await request(reader, writer, {"op": "move", "session": session, "x": x, "y": y})
+                # The AI's move has not been played if the server refused it; ask until it answers
+                while response.get("error") in ("busy", "deadline"):
+                    counts[response["error"]] += 1
+                    await asyncio.sleep(0.05)
+                    response = await request(reader, writer, {"op": "ai_move", "session": session})
+                latencies.append(time.perf_counter() - start)
+                if response.get("ai_move"):
+                    board.make_move(*response["ai_move"], 2)
+                if response.get("winner") or time.monotonic() >= stop_at:
+                    break
+            await request(reader, writer, {"op": "close", "session": session})
+    finally:
+        writer.close()
+
+
+def percentile(values, fraction):
+    """The value below which the given fraction of values fall (nearest rank)."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_level(host, port, unix, sessions, duration, seed):
+    """Run sessions concurrent clients for duration seconds; return (latencies, seconds, counts)."""
+    latencies = []
+    counts = {"busy": 0, "deadline": 0}
+    start = time.monotonic()
+    await asyncio.gather(*(client(host, port, unix, start + duration, random.Random(seed + i), latencies, counts)
+                           for i in range(sessions)))
+    return latencies, time.monotonic() - start, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test game_server.py with many concurrent games.")
+    parser.add_argument("--host", default="127.0.0.1", help="server address")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="server TCP port")
+    parser.add_argument("--unix", default=None, help="connect to this Unix socket path instead of TCP")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32],
+                        help="concurrent games per level")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per level")
+    parser.add_argument("--seed", type=int, default=0, help="base seed for the clients' moves")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>8} {'moves':>6} {'moves/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'busy':>6} {'deadline':>8}")
+    for sessions in args.sessions:
+        latencies, elapsed, counts = asyncio.run(run_level(args.host, args.port, args.unix, sessions,
+                                                           args.duration, args.seed))
+        if not latencies:
+            print(f"{sessions:>8} no moves completed")
+            continue
+        print(f"{sessions:>8} {len(latencies):>6} {len(latencies) / elapsed:>8.1f} "
+              f"{percentile(latencies, 0.5) * 1000:>8.0f} {percentile(latencies, 0.99) * 1000:>8.0f} "
+              f"{counts['busy']:>6} {counts['deadline']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import time
+
+from gomoku_board import CANCEL_CHECK_INTERVAL, SearchCancelled, zobrist_keys
+
+THREAT_NODE_LIMIT = 20000  # Nodes each find_win() call may expand
+THREAT_TIME_LIMIT = 0.3  # Seconds all searches of one ThreatSearch may take together
+THREAT_TIME_SHARE = 0.25  # Most of a timed move's remaining budget the threat search may use
+VCF_DEPTH = 12  # Attacker moves in a continuous-four (VCF) search
+VCT_DEPTH = 4  # Attacker moves in a search that also uses open threes (VCT)
+DIRECTIONS = [(1, 0), (0, 1), (1, 1), (1, -1)]
+
+_window_cache = {}
+
+
+class _BudgetExceeded(Exception):
+    """Raised inside the threat search when its node or time budget runs out."""
+
+
+def line_windows(size, length):
+    """Return (windows, cell_windows): every run of length cells on a line as a tuple of cell indexes
+    (y * size + x), and for each cell the ids of the windows through it."""
+    if (size, length) not in _window_cache:
+        windows = []
+        cell_windows = [[] for _ in range(size * size)]
+        for dx, dy in DIRECTIONS:
+            for y in range(size):
+                for x in range(size):
+                    if not (0 <= x + (length - 1) * dx < size and 0 <= y + (length - 1) * dy < size):
+                        continue
+                    cells = tuple((y + i * dy) * size + x + i * dx for i in range(length))
+                    for cell in cells:
+                        cell_windows[cell].append(len(windows))
+                    windows.append(cells)
+        _window_cache[(size, length)] = (windows, cell_windows)
+    return _window_cache[(size, length)]
+
+
+class ThreatSearch:
+    def __init__(self, board, max_nodes=THREAT_NODE_LIMIT, time_limit=THREAT_TIME_LIMIT, should_stop=None):
+        """Threat-space search over a copy of the board.
+
+        The position is tracked as stone counts per window of win_length cells, so a player's five
+        points (windows one stone short of a win, with no opponent stone) and four-making moves
+        (windows two short) are kept as small sets updated on every move. Only moves that make a four
+        or an open three are expanded, with the defender limited to the replies that stop the threat,
+        so forced wins can be found far deeper than full-width search reaches. With another win
+        length, "five", "four", "three" and "two" mean a win and runs one, two and three stones short.
+
+        should_stop is polled like AIPlayer.should_stop; when it returns True the search raises
+        SearchCancelled.
+        """
+        self.size = board.size
+        win = board.win_length
+        self.windows, self.cell_windows = line_windows(self.size, win)
+        self.cells = [0] * (self.size * self.size)
+        self.counts = [None, [0] * len(self.windows), [0] * len(self.windows)]
+        # levels[player][n]: windows with n of player's stones and none of the other's (tracked for n = win - 3..win - 1)
+        self.levels = [None] + [[set() if win - 3 <= n < win else None for n in range(win + 1)] for _ in range(2)]
+        self.fours = [None, self.levels[1][win - 1], self.levels[2][win - 1]]
+        self.threes = [None, self.levels[1][win - 2], self.levels[2][win - 2]]
+        self.twos = [None, self.levels[1][win - 3], self.levels[2][win - 3]]
+        self.zobrist = zobrist_keys(self.size)
+        self.hash = 0
+        self.max_nodes = max_nodes
+        self.deadline = time.perf_counter() + time_limit
+        self.should_stop = should_stop
+        self.nodes = 0  # Nodes expanded by all find_win() calls so far
+        self.node_limit = max_nodes  # Value of self.nodes at which the running find_win() gives up
+        self.exhausted = False  # True if the last find_win() ran out of budget
+        self.failed = {}  # (hash, side) -> deepest depth at which the attacker was shown not to win
+        for pos, cell in enumerate(board.snapshot()[1]):
+            if cell:
+                self._place(pos, cell)
+
+    def _place(self, pos, player):
+        """Put a stone on cell pos and move the windows through it between the level sets."""
+        self.cells[pos] = player
+        self.hash ^= self.zobrist[player][pos]
+        mine, theirs = self.counts[player], self.counts[3 - player]
+        levels, their_levels = self.levels[player], self.levels[3 - player]
+        for window in self.cell_windows[pos]:
+            count = mine[window] + 1
+            mine[window] = count
+            other = theirs[window]
+            if other == 0:
+                if levels[count - 1] is not None:
+                    levels[count - 1].discard(window)
+                if levels[count] is not None:
+                    levels[count].add(window)
+            elif count == 1 and their_levels[other] is not None:
+                their_levels[other].discard(window)  # No longer usable by the other player
+
+    def _undo(self, pos, player):
+        """Remove the stone placed by _place()."""
+        self.cells[pos] = 0
+        self.hash ^= self.zobrist[player][pos]
+        mine, theirs = self.counts[player], self.counts[3 - player]
+        levels, their_levels = self.levels[player], self.levels[3 - player]
+        for window in self.cell_windows[pos]:
+            count = mine[window] - 1
+            mine[window] = count
+            other = theirs[window]
+            if other == 0:
+                if levels[count + 1] is not None:
+                    levels[count + 1].discard(window)
+                if levels[count] is not None:
+                    levels[count].add(window)
+            elif count == 0 and their_levels[other] is not None:
+                their_levels[other].add(window)
+
+    def _empties(self, windows):
+        """Empty cells of the given windows, in a deterministic order."""
+        cells = self.cells
+        return sorted({cell for window in windows for cell in self.windows[window] if cells[cell] == 0})
+
+    def _open_four_points(self, player, pos):
+        """Cells where player, building on the stone at pos, would get two or more five points at once."""
+        points = []
+        windows = [window for window in self.cell_windows[pos] if window in self.threes[player]]
+        for cell in self._empties(windows):
+            self._place(cell, player)
+            fives = self._empties(window for window in self.cell_windows[cell] if window in self.fours[player])
+            self._undo(cell, player)
+            if len(fives) >= 2:
+                points.append(cell)
+        return points
+
+    def _defenses(self, attacker, pos, allow_threes):
+        """Defender replies to the attacker's stone at pos, or None if it is not a forcing threat.
+
+        An empty list means the threat cannot be stopped (two or more five points).
+        """
+        defender = 3 - attacker
+        if self.fours[defender]:
+            return None  # The defender completes five first
+        fives = self._empties(self.fours[attacker])
+        if len(fives) >= 2:
+            return []
+        if fives:
+            return fives  # A four: blocking the five point is the only reply
+        if not allow_threes or not self._open_four_points(attacker, pos):
+            return None
+        # An open three: every reply that leaves no open four, plus the defender's own fours
+        defenses = []
+        windows = [window for window in self.cell_windows[pos] if window in self.threes[attacker]]
+        for cell in self._empties(windows):
+            self._place(cell, defender)
+            if not self._open_four_points(attacker, pos):
+                defenses.append(cell)
+            self._undo(cell, defender)
+        for cell in self._empties(self.threes[defender]):
+            if cell not in defenses:
+                defenses.append(cell)
+        return defenses
+
+    def _three_moves(self, player):
+        """Cells where player would make an open three."""
+        moves = []
+        for cell in self._empties(self.twos[player]):
+            self._place(cell, player)
+            if self._open_four_points(player, cell):
+                moves.append(cell)
+            self._undo(cell, player)
+        return moves
+
+    def _attack(self, attacker, depth, allow_threes):
+        """Return a winning line (cell indexes, attacker and defender alternating) for the side to move, or None."""
+        self.nodes += 1
+        if self.nodes > self.node_limit or time.perf_counter() > self.deadline:
+            raise _BudgetExceeded()
+        if self.should_stop and self.nodes % CANCEL_CHECK_INTERVAL == 0 and self.should_stop():
+            raise SearchCancelled()
+        defender = 3 - attacker
+        fives = self._empties(self.fours[attacker])
+        if fives:
+            return [fives[0]]  # Five in a row right away
+        blocks = self._empties(self.fours[defender])
+        if len(blocks) > 1 or depth == 0:
+            return None
+        key = (self.hash, attacker)
+        if self.failed.get(key, -1) >= depth:
+            return None
+
+        if blocks:
+            moves = blocks  # The defender threatens five; the block must also be a threat to keep the initiative
+        else:
+            moves = self._empties(self.threes[attacker])
+            if allow_threes:
+                moves += [cell for cell in self._three_moves(attacker) if cell not in moves]
+        for move in moves:
+            self._place(move, attacker)
+            try:
+                defenses = self._defenses(attacker, move, allow_threes)
+                if defenses is None:
+                    continue
+                line = self._refute_all(attacker, defenses, depth, allow_threes)
+                if line is not None:
+                    return [move] + line
+            finally:
+                self._undo(move, attacker)
+        self.failed[key] = depth
+        return None
+
+    def _refute_all(self, attacker, defenses, depth, allow_threes):
+        """Return the line after the first defense if the attacker wins against every defense, else None."""
+        main_line = []
+        for i, cell in enumerate(defenses):
+            self._place(cell, 3 - attacker)
+            try:
+                line = self._attack(attacker, depth - 1, allow_threes)
+            finally:
+                self._undo(cell, 3 - attacker)
+            if line is None:
+                return None
+            if i == 0:
+                main_line = [cell] + line
+        return main_line
+
+    def five_points(self, player):
+        """Empty cells (x, y) where player would complete five in a row."""
+        return [(cell % self.size, cell // self.size) for cell in self._empties(self.fours[player])]
+
+    def place(self, x, y, player):
+        """Put a stone on the search's copy of the board."""
+        self._place(y * self.size + x, player)
+
+    def undo(self, x, y, player):
+        """Remove a stone placed with place()."""
+        self._undo(y * self.size + x, player)
+
+    def find_win(self, attacker):
+        """Look for a forced win for attacker, assuming it is attacker's turn.
+
+        Tries continuous fours (VCF) first, then fours and open threes (VCT). Returns the winning line
+        as (x, y) moves, attacker and defender alternating, or None if none was found within the
+        budget (self.exhausted tells the two cases apart).
+        """
+        self.exhausted = False
+        self.node_limit = self.nodes + self.max_nodes
+        try:
+            for allow_threes, depth in ((False, VCF_DEPTH), (True, VCT_DEPTH)):
+                self.failed = {}
+                line = self._attack(attacker, depth, allow_threes)
+                if line is not None:
+                    return [(cell % self.size, cell // self.size) for cell in line]
+        except _BudgetExceeded:
+            self.exhausted = True
+        return None
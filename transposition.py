@@ -0,0 +1,72 @@
+# Bound types stored with each entry
+EXACT = 0  # The stored score is the exact minimax value
+LOWER = 1  # The search failed high: the true value is >= the stored score
+UPPER = 2  # The search failed low: the true value is <= the stored score
+
+TT_BUCKETS = 1 << 16  # Default number of buckets (each bucket holds two entries)
+
+
+class TranspositionTable:
+    def __init__(self, buckets=TT_BUCKETS):
+        """Create a bounded two-tier transposition table.
+
+        Each bucket has a depth-preferred slot, which keeps the deepest entry of the current
+        search, and an always-replace slot, which takes everything else. Entries are tuples of
+        (key, depth, score, flag, best_move, age).
+        """
+        self.buckets = 1 << max(0, (buckets - 1).bit_length())  # Round up to a power of two
+        self.mask = self.buckets - 1
+        self.slots = [None] * (2 * self.buckets)
+        self.age = 0  # Bumped once per search so stale deep entries can be evicted
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def new_search(self):
+        """Mark the start of a new search; entries from earlier searches become replaceable."""
+        self.age += 1
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        self.slots = [None] * (2 * self.buckets)
+        self.age = 0
+        self.hits = self.misses = self.stores = 0
+
+    def probe(self, key):
+        """Return the entry stored for key, or None."""
+        index = 2 * (key & self.mask)
+        entry = self.slots[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        entry = self.slots[index + 1]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, flag, best_move):
+        """Store a search result, preferring deep entries from the current search."""
+        self.stores += 1
+        index = 2 * (key & self.mask)
+        entry = (key, depth, score, flag, best_move, self.age)
+        deep = self.slots[index]
+        if deep is None or deep[0] == key or deep[1] <= depth or deep[5] != self.age:
+            if deep is not None and deep[0] != key:
+                self.slots[index + 1] = deep  # Demote the old entry instead of dropping it
+            self.slots[index] = entry
+        else:
+            self.slots[index + 1] = entry
+
+    def stats(self):
+        """Return the table's counters and fill level."""
+        probes = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / probes if probes else 0.0,
+            "stores": self.stores,
+            "filled": sum(entry is not None for entry in self.slots),
+            "capacity": len(self.slots),
+        }